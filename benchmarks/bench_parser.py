@@ -0,0 +1,67 @@
+"""
+Benchmark of :func:`dresta.parser.parseQueryDict`
+
+Compares the parser against the previous recursive implementation on a
+filter heavy query string.
+
+.. code-block:: sh
+
+    python -m benchmarks.bench_parser
+"""
+import re
+import timeit
+
+from django.conf import settings
+
+settings.configure()
+
+from django.http import QueryDict  # noqa: E402
+
+from dresta.parser import parseQueryDict  # noqa: E402
+
+
+def recursiveParseQueryDict(querydict: QueryDict) -> dict:
+    """
+    The recursive parser that :func:`parseQueryDict` replaced
+    """
+    parsed = dict()
+
+    def set_node(root, nodes, value):
+        if len(nodes) == 1:
+            root[nodes[0]] = value
+            return
+        if not nodes:
+            return
+        if nodes[0] not in root or not isinstance(root[nodes[0]], dict):
+            root[nodes[0]] = dict()
+        set_node(root[nodes[0]], nodes[1:], value)
+
+    for k, v in querydict.lists():
+        key = k.split('[', 1)[0]
+        sub_keys = re.findall(r"\[(.*?)\]", k)
+        keys = [key] + sub_keys
+        set_node(parsed, keys, v)
+
+    return parsed
+
+
+QUERY = '&'.join(
+    'filter[field%d][op][value%d]=%d' % (i, i % 3, i)
+    for i in range(40)
+) + '&page=2&size=50'
+
+
+def main(number: int = 2000):
+    querydict = QueryDict(QUERY)
+    for name, func in [
+        ('recursive', recursiveParseQueryDict),
+        ('iterative', parseQueryDict),
+    ]:
+        seconds = min(timeit.repeat(
+            lambda: func(querydict), number=number, repeat=5
+        ))
+        print('%-10s %10.0f ops/sec' % (name, number / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+Benchmark suite of the dresta request pipeline
+
+Runs offline with a minimal settings module, and reports the operations per
+second and the peak memory allocated by one operation of every case.
+
+.. code-block:: sh
+
+    python -m benchmarks.run
+    python -m benchmarks.run parse load_nested
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --compare baseline.json
+"""
+import os
+import sys
+import json
+import timeit
+import argparse
+import datetime
+import tracemalloc
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.http import QueryDict  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from marshmallow import Schema, fields  # noqa: E402
+
+from dresta import parser, encoders, formats  # noqa: E402
+from dresta.utils import pagify  # noqa: E402
+from dresta.views import Api  # noqa: E402
+
+from typing import Callable, Dict, List  # noqa: E402
+
+
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def case(func):
+    """
+    Register a benchmark case
+
+    A case sets up its data, and returns the operation to benchmark.
+    """
+    CASES[func.__name__] = func
+    return func
+
+
+class Point:
+    def __init__(self, x: float, y: float, label: str = ''):
+        self.x = x
+        self.y = y
+        self.label = label
+
+
+class Row:
+    def __init__(self, i: int):
+        self.id = i
+        self.name = 'row %d' % i
+        self.score = i / 3
+        self.created = datetime.datetime(2020, 1, 1) \
+            + datetime.timedelta(minutes=i)
+        self.tags = ['a', 'b', 'c']
+
+    def toDict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'score': self.score,
+            'created': self.created,
+            'tags': self.tags,
+        }
+
+
+class RowSchema(Schema):
+    id = fields.Int()
+    name = fields.Str()
+    score = fields.Float()
+    created = fields.DateTime()
+    tags = fields.List(fields.Str())
+
+
+class RowsSchema(Schema):
+    rows = fields.Nested(RowSchema, many=True)
+
+
+def flat(request, a: int, b: float, c: str, d: bool = False,
+         e: int = 0, f: str = ''):
+    return {'a': a}
+
+
+def nested(request, p: Point, q: Point, r: Point = None):
+    return {'x': p.x}
+
+
+def listy(request, ids: List[int], values: List[float], points: List[Point]):
+    return {'count': len(ids)}
+
+
+def rows(request, n: int):
+    return {'rows': [Row(i) for i in range(n)]}
+
+
+@case
+def parse():
+    query = QueryDict('&'.join(
+        'filter[f%d][op][v%d][%d]=%d' % (i, i % 3, i % 2, i)
+        for i in range(50)
+    ))
+    return lambda: parser.parseQueryDict(query)
+
+
+@case
+def merge_body():
+    api = Api(func=flat)
+    body = json.dumps({
+        'a': 1, 'b': 2.5, 'c': 'c',
+        'data': {
+            'k%d' % i: {'v': i, 'w': [i, i + 1], 'x': {'y': i}}
+            for i in range(500)
+        }
+    })
+    request = RequestFactory().post(
+        '/?a=1&data[k1][v]=2', body, content_type='application/json'
+    )
+    return lambda: api._parse(request)
+
+
+def _load(func, params):
+    api = Api(func=func)
+    request = RequestFactory().get('/')
+    return lambda: api._load(request, params)
+
+
+@case
+def load_flat():
+    return _load(flat, {
+        'a': ['1'], 'b': ['2.5'], 'c': ['c'], 'd': ['true'],
+        'e': ['5'], 'f': ['f'],
+    })
+
+
+@case
+def load_nested():
+    return _load(nested, {
+        'p': {'x': ['1'], 'y': ['2']},
+        'q': {'x': 3, 'y': 4, 'label': 'q'},
+        'r': {'x': 5, 'y': 6},
+    })
+
+
+@case
+def load_list():
+    return _load(listy, {
+        'ids': [str(i) for i in range(1000)],
+        'values': [i / 2 for i in range(1000)],
+        'points': [{'x': i, 'y': i} for i in range(100)],
+    })
+
+
+@case
+def dump_schema():
+    api = Api(func=rows, schema=RowsSchema)
+    data = {'rows': [Row(i) for i in range(1000)]}
+    return lambda: api._dump(data)
+
+
+@case
+def encode():
+    data = {'rows': [Row(i) for i in range(1000)]}
+    return lambda: encoders.dumps(data)
+
+
+@case
+def encode_columnar():
+    data = {'rows': [Row(i) for i in range(1000)]}
+    return lambda: formats.FORMATS['columnar'].encode(data)
+
+
+@case
+def encode_msgpack():
+    data = {'rows': [Row(i) for i in range(1000)]}
+    return lambda: formats.FORMATS['msgpack'].encode(data)
+
+
+@case
+def pagify_list():
+    data = list(range(100000))
+    return lambda: pagify(data, 500, 100)
+
+
+@case
+def request():
+    api = Api(func=rows)
+    request = RequestFactory().get('/?n=100')
+    return lambda: api(request)
+
+
+def measure(op: Callable[[], object]) -> dict:
+    """
+    Measure an operation
+
+    :param op: operation
+
+    :return: operations per second, and peak KiB allocated per operation
+    """
+    timer = timeit.Timer(op)
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(repeat=3, number=number))
+
+    tracemalloc.start()
+    try:
+        op()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'ops': number / seconds,
+        'kib': peak / 1024,
+    }
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    args.add_argument('cases', nargs='*', help="cases to run")
+    args.add_argument('--save', help="save the results as a baseline")
+    args.add_argument('--compare', help="compare against a saved baseline")
+    args = args.parse_args(argv)
+
+    names = args.cases or list(CASES)
+    unknown = set(names) - set(CASES)
+    if unknown:
+        sys.exit("Unknown cases: %s" % ', '.join(sorted(unknown)))
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {}
+    for name in names:
+        result = results[name] = measure(CASES[name]())
+        line = '%-12s %12.1f ops/sec %10.1f KiB' % (
+            name, result['ops'], result['kib']
+        )
+        if name in baseline:
+            line += '  %+6.1f%% ops/sec %+6.1f%% KiB' % (
+                (result['ops'] / baseline[name]['ops'] - 1) * 100,
+                (result['kib'] / baseline[name]['kib'] - 1) * 100
+                if baseline[name]['kib'] else 0,
+            )
+        print(line)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""
+Minimal django settings to run the benchmarks offline
+"""
+SECRET_KEY = 'benchmarks'
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['*']
+
+INSTALLED_APPS = []
+
+DATABASES = {}
+
+ROOT_URLCONF = 'benchmarks.urls'
+
+USE_TZ = True
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'loggers': {
+        'django.request': {
+            'level': 'CRITICAL',
+        },
+    },
+}
@@ -18,19 +18,25 @@ To get started, create an :code:`api.py` file in your app folder:
 Each app will get their own prefix. The api path will look like
 :code:`/api/<app_label>/<api_method_name>/`
 """
+import time
 import logging
 
 from importlib import import_module
 
+from django.conf import settings
 from django.urls import path, include
 from django.apps import apps
 
+from . import registry
 from .finder import find_members, load_app_module
+from .batch import BatchView
+from .jobs import JobView
+from .router import Router, AppRouter, use_router
 
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Optional
 
 
-def include_api_patterns(module):
+def include_api_patterns(module, router: Optional[bool] = None):
     """
     Load the api views in a module into a urlpattern
 
@@ -43,39 +49,78 @@ def include_api_patterns(module):
         :meth:`blueweather.api.decorators.api` decorator.
 
     :param module: module or module path
+    :param router: whether to route the views with a single pattern,
+        defaults to the :code:`DRESTA_ROUTER` setting, see
+        :mod:`dresta.router`
+
+    The status view of background jobs is added at :code:`jobs/<job>/` when
+    any api runs in the background, see :mod:`dresta.jobs`. It serves the
+    jobs of every api, so the urls of jobs point to the first status view
+    when several modules are included.
 
     :return: the included api patterns
     """
+    views = find_api_views(module)
+
+    if use_router(router):
+        label = module if isinstance(module, str) else module.__name__
+        patterns = [
+            Router({view.name: view for view in views}, label).urlpattern
+        ]
+    else:
+        patterns = [view.urlpattern for view in views]
+
+    if any(getattr(view, 'background', False) for view in views):
+        # Before the router pattern, which catches every path
+        patterns.insert(0, JobView().urlpattern)
+
+    return include(patterns)
+
+
+def find_api_views(module) -> list:
+    """
+    Find the api views in a module
+
+    Depending on the :code:`DRESTA_DISCOVERY` setting, the views are either
+    found by scanning the members of the module, or from the views that the
+    module registered. See :mod:`dresta.registry`.
+
+    :param module: module or module path
+
+    :return: api views
+    """
     if isinstance(module, str):
         module = import_module(module)
 
     logger = logging.getLogger(__name__)
 
-    # Get all members, ignore private members
-    members = find_members(module)
+    views = None
+    if getattr(settings, 'DRESTA_DISCOVERY', 'scan') == 'registry':
+        views = registry.get_module_views(module.__name__)
+
+    if views is None:
+        # Get all members, ignore private members
+        members = find_members(module)
 
-    # Get all members that have the 'urlpattern' attr (it is an api view)
+        # Get all members that have the 'urlpattern' attr (it is an api view)
 
-    views = [
-        member
-        for member in members
-        if hasattr(member[1], 'urlpattern')
-    ]
+        views = [
+            member[1]
+            for member in members
+            if hasattr(member[1], 'urlpattern')
+        ]
 
     if views:
         logger.debug(
             "Loaded API's: %s",
-            ', '.join(repr(v[1].name) for v in views)
+            ', '.join(repr(v.name) for v in views)
         )
 
-    # Include all the views
-    return include([
-        view[1].urlpattern
-        for view in views
-    ])
+    return views
 
 
-def include_all_api_patterns():
+def include_all_api_patterns(batch: bool = False,
+                             router: Optional[bool] = None):
     """
     Load all of the api patterns from every app
 
@@ -90,8 +135,18 @@ def include_all_api_patterns():
 
             api = 'myapp.api'
 
+    :param batch: whether to add a batch view at :code:`batch/`, see
+        :mod:`dresta.batch`
+    :param router: whether to route the views with a single pattern,
+        defaults to the :code:`DRESTA_ROUTER` setting, see
+        :mod:`dresta.router`
+
+    The status view of background jobs is added at :code:`jobs/<job>/` when
+    any api runs in the background, see :mod:`dresta.jobs`.
+
     :return: the included api patterns
     """
+    start = time.perf_counter()
     all_modules: List[Tuple[str, str]] = []
 
     # Get all the apps that are configured for the api
@@ -102,10 +157,43 @@ def include_all_api_patterns():
                 (config.label, api_module)
             )
 
-    # Load all the api patterns
-    all_patterns = [
-        path('%s/' % name, include_api_patterns(module))
+    # Load all the api views
+    all_views: Dict[str, Dict[str, object]] = {
+        name: {
+            view.name: view
+            for view in find_api_views(module)
+        }
         for name, module in all_modules
-    ]
+    }
+
+    # Load all the api patterns
+    if use_router(router):
+        all_patterns = [AppRouter(all_views).urlpattern]
+    else:
+        all_patterns = [
+            path('%s/' % name, include([
+                view.urlpattern
+                for view in views.values()
+            ]))
+            for name, views in all_views.items()
+        ]
+
+    if batch:
+        all_patterns.append(path('batch/', BatchView(all_views)))
+
+    if any(
+        getattr(view, 'background', False)
+        for views in all_views.values()
+        for view in views.values()
+    ):
+        # Before the app patterns, which may catch every path
+        all_patterns.insert(0, JobView().urlpattern)
+
+    logging.getLogger(__name__).info(
+        "Loaded %d api views from %d apps in %.1fms",
+        sum(len(views) for views in all_views.values()),
+        len(all_views),
+        (time.perf_counter() - start) * 1000
+    )
 
     return include(all_patterns)
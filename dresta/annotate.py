@@ -1,78 +1,208 @@
 """
 Annotate functions into Marshmallow Schemas
 """
+import array
 import inspect
+import typing
+import threading
 
 import collections.abc
+from django.db.models import Model
+
 from marshmallow import Schema, fields
 
-from typing import Type, List
+from typing import Type, List, Any, Union, Optional, Dict
 
 from . import fields as api_fields
 
 
+_NONE_TYPE = type(None)
+
+
 class Annotator:
     """
     Annotates functions into Schemas
+
+    An annotator is safe to use from multiple threads. Each function or type
+    is only built once, and built schemas are read without locking.
+
+    Besides plain types, the typing generics :code:`List[X]`,
+    :code:`Set[X]`, :code:`Tuple[X, ...]`, :code:`Dict[K, V]`, and
+    :code:`Optional[X]` are annotated into fields of their item types.
     """
     annotations = [
-        (inspect._empty, fields.Raw),
         (int, api_fields.QueryDictNumberCast),
         (float, api_fields.QueryDictNumberCast),
         (bool, api_fields.QueryDictBooleanCast),
         (str, api_fields.QueryDictStringCast),
-        (collections.ByteString, api_fields.QueryDictBytesCast),
-        (collections.Sequence, api_fields.RawCast),
-        (collections.Set, api_fields.RawCast),
-        (collections.Mapping, api_fields.RawCast),
+        (bytes, api_fields.QueryDictBytesCast),
+        (bytearray, api_fields.QueryDictBytesCast),
+        (array.array, api_fields.ArrayCast),
+        (Model, api_fields.ModelCast),
+        (collections.abc.Sequence, api_fields.RawCast),
+        (collections.abc.Set, api_fields.RawCast),
+        (collections.abc.Mapping, api_fields.RawCast),
     ]
+    """Pairs of types and the field that casts them"""
+
+    numbers = (int, float)
+    """Item types of lists that are cast in bulk"""
 
     def __init__(self):
         self._registered_schemas = {}
         self._building_schemas = set()
+        self._factories = {}
+        # Schemas are built under a reentrant lock, since building a schema
+        # may recursively build the schemas of its nested types. Locking
+        # per type could deadlock when two types nest each other.
+        self._lock = threading.RLock()
 
-    def _annotate_param(self, parameter: inspect.Parameter) -> fields.Field:
+    def _resolve_factory(self, t: type) -> Optional[Type[fields.Field]]:
         """
-        Annotate a field
+        Find the field factory of a type
 
-        :param parameter: parameter
+        The MRO of the type is checked against :attr:`annotations` first, so
+        the most specific annotation wins. Abstract base classes are checked
+        after that. The result is cached per type.
+
+        :param t: type
+
+        :return: field factory, or :code:`None` if it is not a simple type
+        """
+        try:
+            return self._factories[t]
+        except KeyError:
+            pass
+
+        exact = dict(reversed(self.annotations))
+        factory = None
+        for base in t.__mro__:
+            if base in exact:
+                factory = exact[base]
+                break
+        else:
+            for annotation, f in self.annotations:
+                if issubclass(t, annotation):
+                    factory = f
+                    break
+
+        self._factories[t] = factory
+        return factory
+
+    def _annotate_generic(self, annotation, **params) -> fields.Field:
+        """
+        Annotate a typing generic
+
+        :param annotation: generic type
+        :param params: field parameters
 
         :return: annotated field
         """
-        params = {}
-        if parameter.default == inspect._empty:
-            params['required'] = True
+        origin = typing.get_origin(annotation)
+        args = typing.get_args(annotation)
+
+        if origin is Union:
+            types = [t for t in args if t is not _NONE_TYPE]
+            if len(types) == 1 and len(args) == 2:
+                params['allow_none'] = True
+                return self._annotate_type(types[0], **params)
+            return fields.Raw(**params)
+
+        if not isinstance(origin, type):
+            return fields.Raw(**params)
+
+        # Use concrete types for abstract generics (Sequence[int])
+        if issubclass(origin, collections.abc.Mapping):
+            cast = dict
+        elif issubclass(origin, collections.abc.Set):
+            cast = set if issubclass(set, origin) else origin
+        elif issubclass(origin, collections.abc.Sequence):
+            cast = list if issubclass(list, origin) else origin
         else:
-            params['missing'] = parameter.default
+            return fields.Raw(**params)
+
+        if cast is dict:
+            keys, values = args if args else (Any, Any)
+            return api_fields.DictCast(
+                cast,
+                keys=self._annotate_type(keys),
+                values=self._annotate_type(values),
+                **params
+            )
+
+        if cast is tuple and args and args[-1] is not Ellipsis:
+            return fields.Tuple(
+                tuple(self._annotate_type(t) for t in args),
+                **params
+            )
+
+        item = args[0] if args else Any
+        if item in self.numbers:
+            return api_fields.NumberListCast(cast, item, **params)
+        return api_fields.ListCast(cast, self._annotate_type(item), **params)
+
+    def _annotate_type(self, annotation, **params) -> fields.Field:
+        """
+        Annotate a type into a field
+
+        :param annotation: type
+        :param params: field parameters
+
+        :return: annotated field
+        """
+        if annotation is inspect.Parameter.empty or annotation is Any:
+            return fields.Raw(**params)
 
         # Deal with Schemas inside Schemas
-        if parameter.annotation in self._building_schemas:
+        if annotation in self._building_schemas:
             return api_fields.NestedCast(
-                parameter.annotation,
-                lambda: self._registered_schemas[parameter.annotation](),
+                annotation,
+                lambda: self._registered_schemas[annotation](),
                 **params
             )
 
+        if typing.get_origin(annotation) is not None:
+            return self._annotate_generic(annotation, **params)
+
+        if not isinstance(annotation, type):
+            return fields.Raw(**params)
+
         # Simple types
-        for t, f in self.annotations:
-            if issubclass(parameter.annotation, t):
-                return f(parameter.annotation, **params)
+        factory = self._resolve_factory(annotation)
+        if factory is not None:
+            return factory(annotation, **params)
 
         # Advanced types
         try:
             return api_fields.NestedCast(
-                parameter.annotation,
-                self._registered_schemas[parameter.annotation],
+                annotation,
+                self._registered_schemas[annotation],
                 **params
             )
         except KeyError:
             # Create a new annotation
             return api_fields.NestedCast(
-                parameter.annotation,
-                self.annotate(parameter.annotation),
+                annotation,
+                self.annotate(annotation),
                 **params
             )
 
+    def _annotate_param(self, parameter: inspect.Parameter) -> fields.Field:
+        """
+        Annotate a field
+
+        :param parameter: parameter
+
+        :return: annotated field
+        """
+        params = {}
+        if parameter.default == inspect._empty:
+            params['required'] = True
+        else:
+            params['missing'] = parameter.default
+
+        return self._annotate_type(parameter.annotation, **params)
+
     def annotate(self, func: callable, ignore: List[str] = []) -> Type[Schema]:
         """
         Annotate the function into a schema
@@ -82,22 +212,58 @@ class Annotator:
 
         :return: schema for the function
         """
-        if func in self._registered_schemas:
-            return self._registered_schemas[func]
-        self._building_schemas.add(func)
-        sig = inspect.signature(func)
-        params = {}
-        for param in sig.parameters.values():
-            if param.name in ignore:
-                continue
-            params[param.name] = self._annotate_param(param)
+        # Built schemas are read without locking
+        schema = self._registered_schemas.get(func)
+        if schema is not None:
+            return schema
+
+        with self._lock:
+            # Another thread may have built it while waiting for the lock
+            schema = self._registered_schemas.get(func)
+            if schema is not None:
+                return schema
+
+            self._building_schemas.add(func)
+            try:
+                sig = inspect.signature(func)
+                params = {}
+                for param in sig.parameters.values():
+                    if param.name in ignore:
+                        continue
+                    params[param.name] = self._annotate_param(param)
 
-        schema = Schema.from_dict(params, name=func.__name__)
+                schema = Schema.from_dict(params, name=func.__name__)
+            finally:
+                self._building_schemas.remove(func)
 
-        self._building_schemas.remove(func)
-        self._registered_schemas[func] = schema
+            self._registered_schemas[func] = schema
 
         return schema
 
 
 annotator = Annotator()
+"""The default annotator"""
+
+_namespaces: Dict[str, Annotator] = {}
+_namespaces_lock = threading.Lock()
+
+
+def get_annotator(namespace: Optional[str] = None) -> Annotator:
+    """
+    Get the annotator of an api namespace
+
+    Each namespace has its own annotator, so their schemas are registered
+    and built separately.
+
+    :param namespace: namespace, :code:`None` for the default annotator
+
+    :return: annotator
+    """
+    if namespace is None:
+        return annotator
+    try:
+        return _namespaces[namespace]
+    except KeyError:
+        pass
+    with _namespaces_lock:
+        return _namespaces.setdefault(namespace, Annotator())
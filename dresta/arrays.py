@@ -0,0 +1,115 @@
+"""
+Numeric array parameters
+
+Large numeric payloads, such as time series or coordinates, can be loaded
+into an :code:`array.array` instead of a list of python objects. The whole
+payload is validated in one pass, and stored in a compact buffer that numpy
+can use without copying (:code:`numpy.frombuffer(arr, arr.typecode)`).
+
+.. code-block:: python
+
+    from dresta.arrays import Array
+
+    @api()
+    def my_api(request: HttpRequest, series: Array.of('d', max_length=10000),
+               points: Array.of('f', shape=(None, 2))):
+        ...
+
+An :code:`array.array` annotation loads an array of doubles without limits.
+Arrays are encoded as json lists, with the dimensions of their shape.
+"""
+import array
+import functools
+
+from typing import Optional, Sequence, Tuple, Type
+
+
+DTYPES = frozenset('bBhHiIlLqQfd')
+"""The array typecodes that may be loaded"""
+
+
+class Array(array.array):
+    """
+    A numeric array parameter
+
+    Use :meth:`of` to annotate a parameter with the typecode and limits of
+    the array.
+
+    The loaded array is always flat. When the array has a :attr:`shape`, the
+    shape of the loaded array is set on the instance, and :meth:`view` gives
+    a view of the array in that shape.
+    """
+    dtype = 'd'
+    """typecode of the array"""
+    shape: Optional[Tuple[Optional[int], ...]] = None
+    """shape of the array, the first dimension may be :code:`None`"""
+    min_length: Optional[int] = None
+    """minimum length of the first dimension"""
+    max_length: Optional[int] = None
+    """maximum length of the first dimension"""
+
+    @classmethod
+    def of(cls, dtype: str = 'd',
+           shape: Optional[Sequence[Optional[int]]] = None,
+           min_length: Optional[int] = None,
+           max_length: Optional[int] = None) -> Type['Array']:
+        """
+        Create an array type
+
+        Array types are created once for each set of arguments.
+
+        :param dtype: typecode of the array, see :mod:`array`
+        :param shape: shape of the array, such as :code:`(None, 2)` for a
+            list of pairs. Only the first dimension may be :code:`None`
+        :param min_length: minimum length of the first dimension
+        :param max_length: maximum length of the first dimension
+
+        :return: array type
+        """
+        if shape is not None:
+            shape = tuple(shape)
+        return cls._of(dtype, shape, min_length, max_length)
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _of(cls, dtype: str, shape: Optional[Tuple[Optional[int], ...]],
+            min_length: Optional[int],
+            max_length: Optional[int]) -> Type['Array']:
+        if dtype not in DTYPES:
+            raise ValueError("Invalid array typecode: %r" % (dtype,))
+        if shape is not None:
+            if not shape or any(
+                not isinstance(dim, int) or dim < 1 for dim in shape[1:]
+            ):
+                raise ValueError("Invalid array shape: %r" % (shape,))
+        return type('Array_%s' % dtype, (cls,), {
+            'dtype': dtype,
+            'shape': shape,
+            'min_length': min_length,
+            'max_length': max_length,
+        })
+
+    def view(self) -> memoryview:
+        """
+        View the array in its shape
+
+        :return: memoryview of the array
+        """
+        shape = self.shape
+        if shape is None or len(shape) == 1:
+            return memoryview(self)
+        return memoryview(self).cast('B').cast(self.typecode, shape)
+
+
+def tolist(arr: array.array) -> list:
+    """
+    Convert an array into a list in its shape
+
+    :param arr: array
+
+    :return: list, nested when the array has many dimensions
+    """
+    shape = getattr(arr, 'shape', None)
+    if shape is None or len(shape) == 1:
+        return arr.tolist()
+    return arr.view().tolist()
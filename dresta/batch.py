@@ -0,0 +1,246 @@
+"""
+Batch requests
+
+A batch view runs many api calls in one request. It is enabled with
+:code:`include_all_api_patterns(batch=True)`, and is found at
+:code:`/api/batch/`.
+
+.. code-block:: text
+
+    POST /api/batch/
+    [
+        {"app": "my_app", "name": "my_api", "params": {"num": 5}},
+        {"app": "my_app", "name": "other_api", "method": "POST"}
+    ]
+
+    200 {
+            "results": [
+                {"result": {...}},
+                {"error": {"code": 17, "detail": "Not Found Error", ...}}
+            ]
+        }
+
+The calls are independent of each other. Synchronous api functions are run
+concurrently on a bounded thread pool, and async api functions are run
+concurrently with asyncio. The results are returned in the order of the
+calls.
+
+A call of an api that runs in the background starts a job, and its result
+is the status of the job, see :mod:`dresta.jobs`. The response cache,
+conditional requests, and compression of an api apply to its own
+responses, so calls in a batch always run the api function, and the batch
+response is sent as is.
+"""
+import json
+import asyncio
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http.request import HttpRequest
+from django.http.response import HttpResponse
+
+from . import encoders
+from .exceptions import (
+    APIError, NotFoundError, MethodNotAllowedError, InternalError,
+    USER_ERROR, log_error
+)
+
+from typing import Dict, List, Optional, Tuple
+
+
+DEFAULT_MAX_CALLS = 50
+DEFAULT_MAX_WORKERS = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool that batch calls are run on
+
+    The size of the pool is set with :code:`DRESTA_BATCH_WORKERS`.
+
+    :return: thread pool
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(
+                        settings, 'DRESTA_BATCH_WORKERS', DEFAULT_MAX_WORKERS
+                    ),
+                    thread_name_prefix='dresta-batch'
+                )
+    return _executor
+
+
+class BatchView:
+    """
+    Runs a batch of api calls
+
+    :param apis: api views by app label and name
+    :param max_calls: maximum number of calls in a batch, defaults to
+        :code:`DRESTA_BATCH_MAX_CALLS`
+    """
+    def __init__(self, apis: Dict[str, Dict[str, object]],
+                 max_calls: Optional[int] = None):
+        self.apis = apis
+        self.max_calls = max_calls
+        self.logger = logging.getLogger(__name__)
+
+    def _api_error(self, request: HttpRequest, error: APIError):
+        response = error.response()
+        log_error(request, response, error)
+        return response
+
+    def _parse(self, request: HttpRequest) -> List[Tuple[str, str, dict, str]]:
+        """
+        Parse the calls of a batch request
+
+        :param request: request
+
+        :raises APIError: when the batch is invalid
+
+        :return: list of app label, name, params and method
+        """
+        if request.method != 'POST':
+            raise MethodNotAllowedError(['POST'])
+
+        try:
+            body = json.loads(request.body or b'null')
+        except json.JSONDecodeError as error:
+            raise APIError(
+                USER_ERROR | 3,
+                detail="Invalid Json",
+                error=str(error)
+            )
+
+        max_calls = self.max_calls
+        if max_calls is None:
+            max_calls = getattr(
+                settings, 'DRESTA_BATCH_MAX_CALLS', DEFAULT_MAX_CALLS
+            )
+
+        if not isinstance(body, list):
+            raise APIError(
+                USER_ERROR | 5,
+                detail="Invalid Batch",
+                error="Expected a list of calls"
+            )
+        if len(body) > max_calls:
+            raise APIError(
+                USER_ERROR | 5,
+                detail="Invalid Batch",
+                error="A batch may have at most %d calls" % max_calls
+            )
+
+        calls = []
+        for i, call in enumerate(body):
+            if not isinstance(call, dict) \
+                    or not isinstance(call.get('app'), str) \
+                    or not isinstance(call.get('name'), str) \
+                    or not isinstance(call.get('params', {}), dict) \
+                    or not isinstance(call.get('method', 'GET'), str):
+                raise APIError(
+                    USER_ERROR | 5,
+                    detail="Invalid Batch",
+                    error="Call %d must have an app, a name, and params" % i
+                )
+            calls.append((
+                call['app'],
+                call['name'],
+                call.get('params', {}),
+                call.get('method', 'GET').upper()
+            ))
+        return calls
+
+    def _error(self, error: APIError) -> dict:
+        return {'error': error.details}
+
+    def _internal_error(self) -> dict:
+        self.logger.exception("Internal Error")
+        return self._error(InternalError())
+
+    def _run(self, request: HttpRequest, api, params: dict,
+             method: str) -> dict:
+        try:
+            return {'result': api.execute(request, params, method)}
+        except APIError as error:
+            return self._error(error)
+        except Exception:
+            return self._internal_error()
+        finally:
+            close_old_connections()
+
+    async def _arun(self, request: HttpRequest, api, params: dict,
+                    method: str) -> dict:
+        try:
+            return {'result': await api.aexecute(request, params, method)}
+        except APIError as error:
+            return self._error(error)
+        except Exception:
+            return self._internal_error()
+
+    async def _gather(self, request: HttpRequest, calls: list) -> list:
+        return await asyncio.gather(*(
+            self._arun(request, api, params, method)
+            for api, params, method in calls
+        ))
+
+    def __call__(self, request: HttpRequest):
+        """
+        The batch view
+
+        :param request: request
+        """
+        try:
+            calls = self._parse(request)
+        except APIError as error:
+            return self._api_error(request, error)
+
+        if calls and hasattr(request, 'user'):
+            # Load the user before the calls share the request across threads
+            request.user.is_authenticated
+
+        results: List[Optional[dict]] = [None] * len(calls)
+        futures = []
+        async_calls = []
+        async_indices = []
+        for i, (app, name, params, method) in enumerate(calls):
+            api = self.apis.get(app, {}).get(name)
+            if api is None:
+                results[i] = self._error(NotFoundError(
+                    detail="Api Not Found",
+                    app=app,
+                    name=name
+                ))
+            elif api.is_async:
+                async_calls.append((api, params, method))
+                async_indices.append(i)
+            else:
+                futures.append((i, get_executor().submit(
+                    self._run, request, api, params, method
+                )))
+
+        if async_calls:
+            for i, result in zip(async_indices, async_to_sync(self._gather)(
+                request, async_calls
+            )):
+                results[i] = result
+
+        for i, future in futures:
+            results[i] = future.result()
+
+        backend = encoders.get_backend()
+        return HttpResponse(
+            backend.dumps({'results': results}),
+            content_type=backend.content_type
+        )
@@ -0,0 +1,298 @@
+"""
+Response caches for api views
+
+An api view that is a pure function of its arguments can cache its encoded
+responses, skipping the api function, the result schema, and the json
+encoding on a hit.
+
+.. code-block:: python
+
+    @api(cache=60)
+    def my_api(request: HttpRequest, num: int):
+        ...
+
+    # Invalidate a single entry, or the whole cache
+    my_api.invalidate(num=5)
+    my_api.cache_clear()
+
+The :code:`cache` option of :meth:`dresta.decorators.api` accepts:
+
+* :code:`True`: an in-process LRU cache
+* a number: an in-process LRU cache with that timeout in seconds
+* a string: the alias of a django cache
+* a :class:`ResponseCache`
+"""
+import time
+import json
+import hashlib
+import threading
+
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+
+from django.core.cache import caches
+from django.db.models import Model
+from django.http.response import HttpResponse
+
+from .utils import JsonEncoder
+
+from typing import NamedTuple, Optional, Union
+
+
+class CachedResponse(NamedTuple):
+    """
+    An encoded response
+
+    :param content: encoded body
+    :param content_type: content type
+    :param status: status code
+    """
+    content: bytes
+    content_type: str
+    status: int = 200
+
+    @classmethod
+    def fromResponse(cls, response: HttpResponse) -> 'CachedResponse':
+        """
+        Capture a response
+
+        :param response: response
+
+        :return: cached response
+        """
+        return cls(
+            response.content,
+            response['Content-Type'],
+            response.status_code
+        )
+
+    def response(self) -> HttpResponse:
+        """
+        Create a new response
+
+        :return: response
+        """
+        return HttpResponse(
+            self.content,
+            content_type=self.content_type,
+            status=self.status
+        )
+
+
+class _KeyEncoder(JsonEncoder):
+    """
+    Encodes arguments into a stable cache key
+    """
+    def default(self, obj):
+        if isinstance(obj, (set, frozenset)):
+            return sorted(repr(o) for o in obj)
+        if isinstance(obj, Model):
+            return [obj._meta.label, obj.pk]
+        try:
+            return super().default(obj)
+        except TypeError:
+            pass
+        if hasattr(obj, '__dict__'):
+            return [obj.__class__.__qualname__, vars(obj)]
+        return repr(obj)
+
+
+def make_key(name: str, args: dict, user=None) -> str:
+    """
+    Make a cache key from the arguments of an api function
+
+    :param name: name of the api function
+    :param args: validated arguments
+    :param user: primary key of the user, if the response depends on it
+
+    :return: cache key
+    """
+    data = json.dumps([name, args, user], cls=_KeyEncoder, sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    The base of all response caches
+    """
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        Get a cached response
+
+        :param key: cache key
+
+        :return: cached response, or :code:`None` if there is none
+        """
+        raise NotImplementedError()
+
+    def set(self, key: str, value: CachedResponse):
+        """
+        Cache a response
+
+        :param key: cache key
+        :param value: response
+        """
+        raise NotImplementedError()
+
+    def delete(self, key: str):
+        """
+        Remove a cached response
+
+        :param key: cache key
+        """
+        raise NotImplementedError()
+
+    def clear(self):
+        """
+        Remove all cached responses
+        """
+        raise NotImplementedError()
+
+    async def aget(self, key: str) -> Optional[CachedResponse]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: CachedResponse):
+        self.set(key, value)
+
+
+class LocalResponseCache(ResponseCache):
+    """
+    An in-process LRU cache
+
+    :param timeout: seconds until an entry expires, :code:`None` to never
+        expire
+    :param max_entries: maximum number of entries
+    :param max_size: maximum total size of the cached bodies in bytes
+    """
+    def __init__(self, timeout: Optional[float] = 60,
+                 max_entries: int = 1024, max_size: int = 16 * 1024 * 1024):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self._size -= len(value.content)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            try:
+                value, expires = self._entries[key]
+            except KeyError:
+                return None
+            if expires is not None and expires <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse):
+        size = len(value.content)
+        if size > self.max_size:
+            return
+        expires = None
+        if self.timeout is not None:
+            expires = time.monotonic() + self.timeout
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires)
+            self._size += size
+            while len(self._entries) > self.max_entries \
+                    or self._size > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class DjangoResponseCache(ResponseCache):
+    """
+    A cache that stores responses in a django cache
+
+    Clearing the cache bumps a version that is part of every key, so that
+    old entries are no longer used.
+
+    :param alias: alias of the django cache
+    :param timeout: seconds until an entry expires
+    :param prefix: prefix of the keys
+    """
+    def __init__(self, alias: str = 'default', timeout: Optional[float] = 60,
+                 prefix: str = 'dresta'):
+        self.alias = alias
+        self.timeout = timeout
+        self.prefix = prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version(self) -> int:
+        key = '%s:version' % self.prefix
+        version = self.cache.get(key)
+        if version is None:
+            version = 0
+            self.cache.add(key, version, None)
+        return version
+
+    def _key(self, key: str) -> str:
+        return '%s:%s:%s' % (self.prefix, self._version(), key)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        value = self.cache.get(self._key(key))
+        if value is None:
+            return None
+        return CachedResponse(*value)
+
+    def set(self, key: str, value: CachedResponse):
+        self.cache.set(self._key(key), tuple(value), self.timeout)
+
+    def delete(self, key: str):
+        self.cache.delete(self._key(key))
+
+    def clear(self):
+        key = '%s:version' % self.prefix
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, 1, None)
+
+    async def aget(self, key: str) -> Optional[CachedResponse]:
+        return await sync_to_async(self.get)(key)
+
+    async def aset(self, key: str, value: CachedResponse):
+        await sync_to_async(self.set)(key, value)
+
+
+def get_cache(option: Union[bool, float, str, ResponseCache, None],
+              prefix: str) -> Optional[ResponseCache]:
+    """
+    Get the response cache of the :code:`cache` option of an api
+
+    :param option: cache option
+    :param prefix: key prefix of the api for django caches
+
+    :return: response cache
+    """
+    if option is None or option is False:
+        return None
+    if isinstance(option, ResponseCache):
+        return option
+    if option is True:
+        return LocalResponseCache()
+    if isinstance(option, str):
+        return DjangoResponseCache(alias=option, prefix=prefix)
+    if isinstance(option, (int, float)):
+        return LocalResponseCache(timeout=option)
+    raise TypeError("Invalid cache option: %r" % (option,))
@@ -0,0 +1,191 @@
+"""
+Coalescing of concurrent identical api calls
+
+When many clients request the same thing at the same time, an api view with
+:code:`coalesce=True` runs its function once, and every duplicate call waits
+for the encoded response of the first one instead of running it again.
+
+.. code-block:: python
+
+    @api(coalesce=True)
+    def report(request: HttpRequest, day: datetime.date):
+        ...
+
+Calls are identical when they are GET or HEAD requests of the same endpoint
+with the same validated arguments, format, and selected fields. Responses
+are shared between users unless :code:`cache_user=True`.
+
+Coalescing works across the threads of a WSGI server and the tasks of an
+ASGI server alike. It pairs well with a response cache, which is filled by
+the first call while the duplicates wait for it.
+
+The number of coalesced calls of every endpoint is read with
+:func:`get_stats`.
+"""
+import asyncio
+import threading
+
+from concurrent.futures import Future
+
+from django.http.response import HttpResponse
+
+from .cache import CachedResponse
+from . import registry
+
+from typing import Awaitable, Callable, Dict, Optional
+
+
+_CANCELLED = object()
+"""The outcome of a leading call that was cancelled"""
+
+
+class Flights:
+    """
+    The calls of an endpoint that are in flight
+
+    The first call of a key runs, and is the leader of the calls that
+    join it while it runs. They are given a copy of its response, or raise
+    its exception. Streaming responses can't be shared, so their followers
+    run on their own. When an async leader is cancelled, its followers
+    start over and one of them leads instead.
+    """
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _join(self, key: str):
+        """
+        Join the call of a key
+
+        :param key: call key
+
+        :return: future response of the call, and whether this call leads
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.leaders += 1
+            return future, True
+
+    def _land(self, key: str, future: Future,
+              response: Optional[HttpResponse] = None,
+              error: Optional[BaseException] = None):
+        """
+        Share the outcome of a leading call with its followers
+
+        :param key: call key
+        :param future: future response of the call
+        :param response: response of the call
+        :param error: exception of the call
+        """
+        with self._lock:
+            del self._calls[key]
+        if future.done():
+            return
+        if isinstance(error, asyncio.CancelledError):
+            future.set_result(_CANCELLED)
+        elif error is not None:
+            future.set_exception(error)
+        elif response.streaming:
+            future.set_result(None)
+        else:
+            future.set_result((
+                CachedResponse.fromResponse(response),
+                getattr(response, 'api_error', False)
+            ))
+
+    def _share(self, shared: Optional[tuple]) -> Optional[HttpResponse]:
+        """
+        Copy the response of a leading call
+
+        :param shared: encoded response, and whether it is an error
+
+        :return: response, or :code:`None` if it can't be shared
+        """
+        if shared is None:
+            return None
+        cached, api_error = shared
+        response = cached.response()
+        if api_error:
+            response.api_error = True
+        return response
+
+    def run(self, key: str,
+            call: Callable[[], HttpResponse]) -> HttpResponse:
+        """
+        Run a call, or wait for an identical call that is in flight
+
+        :param key: call key
+        :param call: runs the call
+
+        :return: response
+        """
+        future, leader = self._join(key)
+        if not leader:
+            shared = future.result()
+            if shared is _CANCELLED:
+                return self.run(key, call)
+            shared = self._share(shared)
+            return call() if shared is None else shared
+        try:
+            response = call()
+        except BaseException as error:
+            self._land(key, future, error=error)
+            raise
+        self._land(key, future, response)
+        return response
+
+    async def arun(self, key: str, call: Callable[[], Awaitable[HttpResponse]]
+                   ) -> HttpResponse:
+        """
+        Run an async call, or wait for an identical call that is in flight
+
+        :param key: call key
+        :param call: runs the call
+
+        :return: response
+        """
+        future, leader = self._join(key)
+        if not leader:
+            # A follower that is cancelled must not cancel the shared future
+            shared = await asyncio.shield(asyncio.wrap_future(future))
+            if shared is _CANCELLED:
+                return await self.arun(key, call)
+            shared = self._share(shared)
+            return await call() if shared is None else shared
+        try:
+            response = await call()
+        except BaseException as error:
+            self._land(key, future, error=error)
+            raise
+        self._land(key, future, response)
+        return response
+
+    def toDict(self) -> dict:
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls),
+            }
+
+
+def get_stats() -> Dict[str, dict]:
+    """
+    Get the coalescing statistics of every endpoint that coalesces calls
+
+    :code:`leaders` counts the calls that ran, and :code:`coalesced` counts
+    the calls that waited for one of them instead.
+
+    :return: statistics by endpoint
+    """
+    return {
+        view._qualname: view.flights.toDict()
+        for view in registry.get_views()
+        if getattr(view, 'flights', None) is not None
+    }
@@ -0,0 +1,191 @@
+"""
+Response compression for api views
+
+An api view can gzip its responses when the client accepts it, instead of
+relying on :code:`GZipMiddleware` to compress every response.
+
+.. code-block:: python
+
+    @api(compress=True)
+    def my_api(request: HttpRequest):
+        ...
+
+The :code:`compress` option of :meth:`dresta.decorators.api` accepts:
+
+* :code:`None`: use the :code:`DRESTA_COMPRESS` setting (default :code:`False`)
+* :code:`True`: compress with the default level and threshold
+* a number: compress with that level
+* a :class:`Compression`
+
+Responses smaller than the threshold are sent as is, since compressing them
+costs more than it saves. Streamed responses are always compressed, one
+chunk at a time as they are generated. Error responses are not compressed.
+"""
+import re
+import zlib
+
+from django.conf import settings
+from django.http.request import HttpRequest
+from django.http.response import HttpResponseBase
+from django.utils.cache import patch_vary_headers
+
+from typing import AsyncIterator, Iterable, Iterator, Optional, Union
+
+
+DEFAULT_LEVEL = 6
+DEFAULT_MIN_SIZE = 1024
+
+_GZIP = re.compile(r'\bgzip\b\s*(?:;\s*q\s*=\s*([0-9.]+))?', re.IGNORECASE)
+
+
+def accepts_gzip(request: HttpRequest) -> bool:
+    """
+    Whether a request accepts gzip responses
+
+    :param request: request
+
+    :return: whether gzip is accepted
+    """
+    match = _GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if match is None:
+        return False
+    try:
+        return match.group(1) is None or float(match.group(1)) > 0
+    except ValueError:
+        return False
+
+
+class Compression:
+    """
+    Gzip compression of responses
+
+    :param level: compression level from 1 to 9
+    :param min_size: minimum size of the body in bytes to compress, defaults
+        to :code:`DRESTA_COMPRESS_MIN_SIZE`
+    """
+    def __init__(self, level: int = DEFAULT_LEVEL,
+                 min_size: Optional[int] = None):
+        self.level = level
+        if min_size is None:
+            min_size = DEFAULT_MIN_SIZE
+            if settings.configured:
+                min_size = getattr(
+                    settings, 'DRESTA_COMPRESS_MIN_SIZE', min_size
+                )
+        self.min_size = min_size
+
+    def _compressor(self):
+        # wbits 31 writes a gzip header and trailer
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compress a body
+
+        :param data: body
+
+        :return: compressed body
+        """
+        compressor = self._compressor()
+        return compressor.compress(data) + compressor.flush()
+
+    def iter_compress(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Compress a streamed body chunk by chunk
+
+        :param chunks: chunks of the body
+
+        :return: compressed chunks
+        """
+        compressor = self._compressor()
+        for chunk in chunks:
+            data = compressor.compress(chunk) \
+                + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    async def aiter_compress(
+            self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """
+        Compress an async streamed body chunk by chunk
+
+        :param chunks: chunks of the body
+
+        :return: compressed chunks
+        """
+        compressor = self._compressor()
+        async for chunk in chunks:
+            data = compressor.compress(chunk) \
+                + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def apply(self, request: HttpRequest,
+              response: HttpResponseBase) -> HttpResponseBase:
+        """
+        Compress a response if the request accepts it
+
+        :param request: request
+        :param response: response
+
+        :return: the response
+        """
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.has_header('Content-Encoding') \
+                or not accepts_gzip(request):
+            return response
+
+        if response.streaming:
+            if getattr(response, 'is_async', False):
+                response.streaming_content = self.aiter_compress(
+                    response.streaming_content
+                )
+            else:
+                response.streaming_content = self.iter_compress(
+                    response.streaming_content
+                )
+            del response['Content-Length']
+        else:
+            if len(response.content) < self.min_size:
+                return response
+            compressed = self.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # The compressed body is not the same as the one the ETag was made
+        # from
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        response['Content-Encoding'] = 'gzip'
+        return response
+
+
+def get_compression(
+        option: Union[bool, int, Compression, None]) -> Optional[Compression]:
+    """
+    Get the compression of the :code:`compress` option of an api
+
+    :param option: compress option
+
+    :return: compression
+    """
+    if option is None:
+        option = settings.configured \
+            and getattr(settings, 'DRESTA_COMPRESS', False)
+    if option is False:
+        return None
+    if isinstance(option, Compression):
+        return option
+    if option is True:
+        return Compression(
+            getattr(settings, 'DRESTA_COMPRESS_LEVEL', DEFAULT_LEVEL)
+        )
+    if isinstance(option, int):
+        return Compression(option)
+    raise TypeError("Invalid compress option: %r" % (option,))
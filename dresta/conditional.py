@@ -0,0 +1,170 @@
+"""
+Conditional requests
+
+Polling clients can avoid downloading a response that has not changed. An
+api answers conditional requests in one of two ways:
+
+* :code:`@api(etag=True)`: the ETag is the hash of the encoded response.
+  A request whose :code:`If-None-Match` matches gets a :code:`304` without a
+  body, but the api function still runs.
+* :code:`@api(etag=func)` and/or :code:`@api(last_modified=func)`: the
+  functions take the same arguments as the api function, and are called
+  before it. When the response has not changed, the api function is not run
+  at all.
+
+.. code-block:: python
+
+    def book_modified(request, id: int):
+        return Book.objects.filter(pk=id).values_list('modified', flat=True)[0]
+
+    @api(last_modified=book_modified)
+    def book(request, id: int):
+        ...
+
+The etag function returns the ETag without quotes, and the last modified
+function returns a datetime. Either may return :code:`None` when it is not
+known. Automatic ETags are enabled for every api with
+:code:`DRESTA_ETAGS = True`.
+"""
+import hashlib
+import calendar
+import inspect
+
+from django.http.request import HttpRequest
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from typing import Callable, Optional, Tuple
+
+
+class Conditions:
+    """
+    The validators of a response, found before the api function runs
+
+    :param etag: returns the ETag of the response
+    :param last_modified: returns when the response was last modified
+    """
+    def __init__(self, etag: Optional[Callable] = None,
+                 last_modified: Optional[Callable] = None):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.is_async = any(
+            inspect.iscoroutinefunction(f)
+            for f in (etag, last_modified)
+        )
+
+    def _validators(self, etag, last_modified) -> Tuple[Optional[str],
+                                                        Optional[int]]:
+        if etag is not None:
+            etag = quote_etag(str(etag))
+        if last_modified is not None:
+            last_modified = calendar.timegm(last_modified.utctimetuple())
+        return etag, last_modified
+
+    def evaluate(self, bound: inspect.BoundArguments
+                 ) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Find the validators of a call
+
+        :param bound: arguments of the call
+
+        :return: quoted ETag, and last modified timestamp
+        """
+        etag = last_modified = None
+        if self.etag is not None:
+            etag = self.etag(*bound.args, **bound.kwargs)
+        if self.last_modified is not None:
+            last_modified = self.last_modified(*bound.args, **bound.kwargs)
+        return self._validators(etag, last_modified)
+
+    async def aevaluate(self, bound: inspect.BoundArguments
+                        ) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Find the validators of a call with async functions
+
+        :param bound: arguments of the call
+
+        :return: quoted ETag, and last modified timestamp
+        """
+        etag = last_modified = None
+        if self.etag is not None:
+            etag = self.etag(*bound.args, **bound.kwargs)
+            if inspect.isawaitable(etag):
+                etag = await etag
+        if self.last_modified is not None:
+            last_modified = self.last_modified(*bound.args, **bound.kwargs)
+            if inspect.isawaitable(last_modified):
+                last_modified = await last_modified
+        return self._validators(etag, last_modified)
+
+
+def set_validators(response: HttpResponseBase, etag: Optional[str],
+                   last_modified: Optional[int]) -> HttpResponseBase:
+    """
+    Add the validators to a response
+
+    :param response: response
+    :param etag: quoted ETag
+    :param last_modified: last modified timestamp
+
+    :return: response
+    """
+    if etag is not None and not response.has_header('ETag'):
+        response['ETag'] = etag
+    if last_modified is not None and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def check(request: HttpRequest, etag: Optional[str],
+          last_modified: Optional[int]) -> Optional[HttpResponseBase]:
+    """
+    Answer a conditional request before the response is created
+
+    :param request: request
+    :param etag: quoted ETag
+    :param last_modified: last modified timestamp
+
+    :return: a :code:`304` or :code:`412` response, or :code:`None` when
+        the response should be created
+    """
+    if etag is None and last_modified is None:
+        return None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        return None
+    return set_validators(response, etag, last_modified)
+
+
+def content_etag(content: bytes) -> str:
+    """
+    The strong ETag of an encoded response
+
+    :param content: encoded response
+
+    :return: quoted ETag
+    """
+    return '"%s"' % hashlib.sha1(content).hexdigest()
+
+
+def respond(request: HttpRequest,
+            response: HttpResponseBase) -> HttpResponseBase:
+    """
+    Answer a conditional request with the ETag of the encoded response
+
+    :param request: request
+    :param response: response
+
+    :return: a :code:`304` response, or the response
+    """
+    if request.method not in ('GET', 'HEAD') or response.streaming \
+            or response.status_code != 200:
+        return response
+    if not response.has_header('ETag'):
+        response['ETag'] = content_etag(response.content)
+    return get_conditional_response(
+        request, etag=response['ETag'], response=response
+    )
@@ -2,12 +2,24 @@
 Api Decorators
 """
 from functools import update_wrapper
+from concurrent.futures import Executor
 
 from . import views
+from . import registry
+from .annotate import get_annotator
 
 from marshmallow import Schema
 
-from typing import Optional, List, Type
+from .cache import ResponseCache
+from .compression import Compression
+from .limits import ConcurrencyLimit, RateLimit
+from .resolver import Hint
+
+from django.db.models import Model
+
+from typing import (
+    Callable, Optional, Dict, List, Sequence, Tuple, Type, Union
+)
 
 
 def api(name: str = None, *,
@@ -15,7 +27,23 @@ def api(name: str = None, *,
         allow_get_params: bool = True,
         auth_required: bool = False,
         args_schema: Optional[Type[Schema]] = None,
-        schema: Optional[Type[Schema]] = None):
+        schema: Optional[Type[Schema]] = None,
+        compiled: bool = True,
+        cache: Union[bool, float, str, ResponseCache, None] = None,
+        cache_user: bool = False,
+        lazy: Optional[bool] = None,
+        namespace: Optional[str] = None,
+        formats: Optional[Sequence[str]] = None,
+        compress: Union[bool, int, Compression, None] = None,
+        background: Union[bool, str, Executor] = False,
+        lookup: Optional[Dict[Type[Model], str]] = None,
+        select_related: Hint = None,
+        only: Hint = None,
+        etag: Union[bool, Callable, None] = None,
+        last_modified: Optional[Callable] = None,
+        coalesce: bool = False,
+        concurrency: Union[int, ConcurrencyLimit, None] = None,
+        rate: Union[str, Tuple[float, int], RateLimit, None] = None):
     """
     Create an api view
 
@@ -26,6 +54,37 @@ def api(name: str = None, *,
     :param args_schema: request schema
     :param auth_required: whether you need to be authenticated to access the
         api
+    :param compiled: whether to load the arguments with a precompiled loader
+        when the request schema supports it
+    :param cache: response cache for GET requests, see :mod:`dresta.cache`
+    :param cache_user: whether cached responses depend on the user
+    :param lazy: whether to build the request schema on the first request,
+        defaults to the :code:`DRESTA_LAZY_SCHEMAS` setting
+    :param namespace: namespace of the annotator that builds the request
+        schema, see :func:`dresta.annotate.get_annotator`
+    :param formats: response formats, the first is the default, see
+        :mod:`dresta.formats`
+    :param compress: response compression, defaults to the
+        :code:`DRESTA_COMPRESS` setting, see :mod:`dresta.compression`
+    :param background: whether to run the api function as a background job,
+        and on which executor, see :mod:`dresta.jobs`
+    :param lookup: lookup fields of model parameters by model, see
+        :mod:`dresta.resolver`
+    :param select_related: related fields to select when loading model
+        parameters, for every model or by model
+    :param only: fields to load of model parameters, for every model or by
+        model
+    :param etag: :code:`True` to add the hash of the response as its ETag,
+        or a function that returns the ETag of a call, defaults to the
+        :code:`DRESTA_ETAGS` setting, see :mod:`dresta.conditional`
+    :param last_modified: a function that returns when the response of a
+        call was last modified
+    :param coalesce: whether concurrent identical calls wait for the
+        response of the first one, see :mod:`dresta.coalesce`
+    :param concurrency: maximum number of requests that run at once, see
+        :mod:`dresta.limits`
+    :param rate: requests per client over time, like :code:`'10/m'`, see
+        :mod:`dresta.limits`
     """
 
     def decorator(func: callable):
@@ -36,8 +95,26 @@ def api(name: str = None, *,
             auth_required=auth_required,
             args_schema=args_schema,
             schema=schema,
+            compiled=compiled,
+            cache=cache,
+            cache_user=cache_user,
+            lazy=lazy,
+            annotator=get_annotator(namespace),
+            formats=formats,
+            compress=compress,
+            background=background,
+            lookup=lookup,
+            select_related=select_related,
+            only=only,
+            etag=etag,
+            last_modified=last_modified,
+            coalesce=coalesce,
+            concurrency=concurrency,
+            rate=rate,
             name=name
         )
-        return update_wrapper(obj, func)
+        update_wrapper(obj, func)
+        registry.register(obj)
+        return obj
 
     return decorator
@@ -0,0 +1,115 @@
+"""
+Json encoder backends
+
+The backend used to encode api results is selected with the
+:code:`DRESTA_JSON_BACKEND` setting, the dotted path to a
+:class:`JsonBackend` class.
+
+.. code-block:: python
+
+    DRESTA_JSON_BACKEND = 'dresta.encoders.OrjsonBackend'
+
+By default, :class:`StdlibBackend` is used.
+"""
+import functools
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .utils import JsonEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+DEFAULT_BACKEND = 'dresta.encoders.StdlibBackend'
+
+
+class JsonBackend:
+    """
+    The base of all json backends
+
+    :param encoder: the encoder which converts non-native objects
+    """
+    content_type = 'application/json'
+
+    def __init__(self, encoder=JsonEncoder):
+        self.encoder = encoder
+
+    def dumps(self, obj) -> bytes:
+        """
+        Encode an object into utf-8 json
+
+        :param obj: object
+
+        :return: encoded object
+        """
+        raise NotImplementedError()
+
+
+class StdlibBackend(JsonBackend):
+    """
+    Encodes with the standard library encoder
+
+    The output is the same as django's :code:`JsonResponse`.
+    """
+    def __init__(self, encoder=JsonEncoder):
+        super().__init__(encoder)
+        # Encoders don't hold any state while encoding, so one is shared
+        self._encoder = encoder()
+
+    def dumps(self, obj) -> bytes:
+        return self._encoder.encode(obj).encode('utf-8')
+
+
+class OrjsonBackend(JsonBackend):
+    """
+    Encodes with `orjson <https://github.com/ijl/orjson>`_
+
+    orjson writes straight to bytes and is much faster than the standard
+    library, but its output is compact and not ascii escaped.
+    """
+    def __init__(self, encoder=JsonEncoder):
+        if orjson is None:
+            raise ImportError("OrjsonBackend requires orjson to be installed")
+        super().__init__(encoder)
+        self._default = encoder.convert
+        # Let the encoder convert dates, so the output is the same as the
+        # standard library backend
+        self._option = orjson.OPT_PASSTHROUGH_DATETIME \
+            | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj) -> bytes:
+        return orjson.dumps(obj, default=self._default, option=self._option)
+
+
+@functools.lru_cache(maxsize=None)
+def get_backend() -> JsonBackend:
+    """
+    Get the configured json backend
+
+    :return: json backend
+    """
+    path = getattr(settings, 'DRESTA_JSON_BACKEND', DEFAULT_BACKEND)
+    return import_string(path)()
+
+
+@receiver(setting_changed)
+def _reset_backend(setting, **kwargs):
+    if setting == 'DRESTA_JSON_BACKEND':
+        get_backend.cache_clear()
+
+
+def dumps(obj) -> bytes:
+    """
+    Encode an object with the configured json backend
+
+    :param obj: object
+
+    :return: encoded object
+    """
+    return get_backend().dumps(obj)
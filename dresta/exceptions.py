@@ -1,11 +1,40 @@
 """
 Exceptions that can be raised in an api function
+
+Error responses are logged with :code:`log_response`. Logging can be limited
+per error code with the :code:`DRESTA_ERROR_LOGGING` setting, which maps
+error codes (or :code:`'default'`) to one of:
+
+* :code:`True`: log every error (default)
+* :code:`False`: never log the error
+* a float between 0 and 1: log that fraction of the errors
+* a tuple :code:`(count, seconds)`: log at most :code:`count` errors every
+  :code:`seconds`
+
+.. code-block:: python
+
+    DRESTA_ERROR_LOGGING = {
+        'default': (10, 1),
+        USER_ERROR | 2: False,
+        VALI_ERROR | 2: 0.01,
+    }
 """
 import json
-from django.http.response import JsonResponse
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http.response import HttpResponse
+from django.utils.log import log_response
 
 from marshmallow import ValidationError
 
+from typing import Dict, Optional, Tuple, Union
+
 
 USER_ERROR = 0b0001_0000
 '''An error caused by the user.'''
@@ -18,7 +47,15 @@ VALI_ERROR = 0b0100_0000
 class APIError(Exception):
     """
     The base exception for all api exceptions
+
+    Errors are sent with status 200, and told apart by their :code:`code`.
+    Errors that clients should retry later are the exception, since proxies
+    and client libraries only back off on their status and
+    :code:`Retry-After` header.
     """
+    status = 200
+    """The status code of the response"""
+
     def __init__(self, code: int, detail: str = "API Error", **kwargs):
         self.code = code
         self.detail = detail
@@ -28,8 +65,33 @@ class APIError(Exception):
             'detail': detail
         })
 
+    def content(self) -> bytes:
+        """
+        The encoded details of the error
+        """
+        try:
+            return _encoder.encode(self.details).encode('utf-8')
+        except TypeError:
+            return json.dumps(
+                self.details, cls=DjangoJSONEncoder
+            ).encode('utf-8')
+
+    def headers(self) -> Dict[str, str]:
+        """
+        The headers of the response
+        """
+        return {}
+
     def response(self):
-        return JsonResponse(self.details)
+        response = HttpResponse(
+            self.content(), content_type='application/json',
+            status=self.status
+        )
+        for header, value in self.headers().items():
+            response[header] = value
+        # Api views send error responses without compressing them
+        response.api_error = True
+        return response
 
     def __str__(self):
         return json.dumps(self.details)
@@ -44,6 +106,122 @@ class APIError(Exception):
         )
 
 
+class StaticError(APIError):
+    """
+    An error whose details only depend on its arguments
+
+    The encoded details are cached, so that raising the same error again
+    does not encode it again.
+    """
+    _encoded: Dict[tuple, bytes] = {}
+    _max_encoded = 1024
+
+    def __init__(self, code: int, detail: str = "API Error", **kwargs):
+        super().__init__(code, detail, **kwargs)
+        self._key = (code, detail) + tuple(
+            (key, _freeze(value)) for key, value in kwargs.items()
+        )
+
+    def content(self) -> bytes:
+        try:
+            return self._encoded[self._key]
+        except KeyError:
+            pass
+        except TypeError:
+            # The arguments are not hashable
+            return super().content()
+        content = super().content()
+        if len(self._encoded) < self._max_encoded:
+            self._encoded[self._key] = content
+        return content
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class MethodNotAllowedError(StaticError):
+    """
+    An error when the request method is not allowed
+    """
+    METHOD_NOT_ALLOWED = USER_ERROR | 2
+
+    def __init__(self, methods: list, code: int = METHOD_NOT_ALLOWED,
+                 detail: str = "Method Not Allowed", **kwargs):
+        super().__init__(code, detail, methods=methods, **kwargs)
+
+
+class NotAcceptableError(StaticError):
+    """
+    An error when the requested response format is not available
+    """
+    NOT_ACCEPTABLE = USER_ERROR | 6
+
+    def __init__(self, formats: list, code: int = NOT_ACCEPTABLE,
+                 detail: str = "Not Acceptable", **kwargs):
+        super().__init__(code, detail, formats=formats, **kwargs)
+
+
+class AuthenticationError(StaticError):
+    """
+    An error when the request is not authenticated
+    """
+    AUTH_REQUIRED = USER_ERROR | 4
+
+    def __init__(self, code: int = AUTH_REQUIRED,
+                 detail: str = "Authentication required.", **kwargs):
+        super().__init__(code, detail, **kwargs)
+
+
+class RateLimitError(StaticError):
+    """
+    An error when a client made too many requests
+
+    It is sent with status 429, and the seconds to wait in the
+    :code:`Retry-After` header.
+    """
+    RATE_LIMITED = USER_ERROR | 7
+    status = 429
+
+    def __init__(self, retry: int, code: int = RATE_LIMITED,
+                 detail: str = "Too Many Requests", **kwargs):
+        super().__init__(code, detail, retry=retry, **kwargs)
+        self.retry = retry
+
+    def headers(self) -> Dict[str, str]:
+        return {'Retry-After': str(self.retry)}
+
+
+class OverloadedError(StaticError):
+    """
+    An error when the api is handling too many requests
+
+    It is sent with status 503, and a :code:`Retry-After` header of
+    :code:`retry_after` seconds.
+    """
+    OVERLOADED = SERV_ERROR | 1
+    status = 503
+    retry_after = 1
+
+    def __init__(self, code: int = OVERLOADED,
+                 detail: str = "Service Unavailable", **kwargs):
+        super().__init__(code, detail, **kwargs)
+
+    def headers(self) -> Dict[str, str]:
+        return {'Retry-After': str(self.retry_after)}
+
+
+class InternalError(StaticError):
+    """
+    An error when the server failed unexpectedly
+    """
+    def __init__(self, code: int = SERV_ERROR,
+                 detail: str = "Internal Error", **kwargs):
+        super().__init__(code, detail, **kwargs)
+
+
 class NotFoundError(APIError):
     """
     An error when something was not found
@@ -71,3 +249,105 @@ class ValidateError(APIError):
         :param validation: Validation Error
         """
         return cls(validation.messages, **kwargs)
+
+
+_encoder = json.JSONEncoder()
+
+
+class _LogLimit:
+    """
+    Limits how many errors are logged in a window of time
+
+    :param count: number of errors to log per window
+    :param seconds: length of the window
+    """
+    def __init__(self, count: int, seconds: float):
+        self.count = count
+        self.seconds = seconds
+        self._start = 0.0
+        self._logged = 0
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> Tuple[bool, int]:
+        """
+        Whether to log an error
+
+        :return: whether to log it, and how many errors were suppressed
+            since the last logged error
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._start >= self.seconds:
+                self._start = now
+                self._logged = 0
+            if self._logged >= self.count:
+                self.suppressed += 1
+                return False, 0
+            self._logged += 1
+            suppressed, self.suppressed = self.suppressed, 0
+            return True, suppressed
+
+
+_LogOption = Union[bool, float, _LogLimit]
+_log_options: Optional[Dict[Union[int, str], _LogOption]] = None
+
+
+def _log_option(code: int) -> _LogOption:
+    global _log_options
+    options = _log_options
+    if options is None:
+        options = {}
+        configured = getattr(settings, 'DRESTA_ERROR_LOGGING', {})
+        for key, value in configured.items():
+            if isinstance(value, tuple):
+                value = _LogLimit(*value)
+            options[key] = value
+        _log_options = options
+    try:
+        return options[code]
+    except KeyError:
+        return options.get('default', True)
+
+
+@receiver(setting_changed)
+def _reset_logging(setting, **kwargs):
+    global _log_options
+    if setting == 'DRESTA_ERROR_LOGGING':
+        _log_options = None
+
+
+def log_error(request, response, error: APIError):
+    """
+    Log an error response, as configured by :code:`DRESTA_ERROR_LOGGING`
+
+    :param request: request
+    :param response: error response
+    :param error: api error
+    """
+    option = _log_option(error.code)
+    suppressed = 0
+    if option is True:
+        pass
+    elif option is False:
+        return
+    elif isinstance(option, _LogLimit):
+        allowed, suppressed = option.allow()
+        if not allowed:
+            return
+    elif random.random() >= option:
+        return
+
+    if suppressed:
+        log_response(
+            '%s (%s): %s (%d similar errors suppressed)',
+            error.details, error.code, request.path, suppressed,
+            response=response,
+            request=request
+        )
+    else:
+        log_response(
+            '%s (%s): %s', error.details, error.code, request.path,
+            response=response,
+            request=request
+        )
@@ -1,11 +1,15 @@
 """
 Marshmallow fields for api views
 """
+import array
+import itertools
 import collections.abc
 from marshmallow import fields, ValidationError, utils
 import inspect
 
-from typing import List
+from .resolver import ModelRef
+
+from typing import List, Optional
 
 
 class RawCast(fields.Raw):
@@ -33,7 +37,7 @@ class QueryDictRawCast(RawCast):
     def _get_value(self, value):
         if isinstance(value, str):
             return value
-        if isinstance(value, collections.Sequence):
+        if isinstance(value, collections.abc.Sequence):
             return value[-1]
         return value
 
@@ -53,7 +57,7 @@ class QueryDictBytesCast(QueryDictRawCast):
         value = self._get_value(value)
         if isinstance(value, str):
             value = value.encode('utf-8')
-        if not isinstance(value, collections.ByteString):
+        if not isinstance(value, (bytes, bytearray)):
             raise self.make_error("invalid")
 
         return self._output(value)
@@ -68,7 +72,7 @@ class QueryDictStringCast(QueryDictRawCast):
 
     def _deserialize(self, value: List[str], attr, data, **kwargs):
         value = self._get_value(value)
-        if not isinstance(value, (str, collections.ByteString)):
+        if not isinstance(value, (str, bytes, bytearray)):
             raise self.make_error("invalid")
         try:
             return utils.ensure_text_type(value)
@@ -122,14 +126,266 @@ class QueryDictBooleanCast(QueryDictRawCast):
         return self.cast(self._validated(self._get_value(value)))
 
 
+class ModelCast(QueryDictRawCast):
+    """
+    Loads the key of a django model
+
+    The key is replaced with the model instance after loading, see
+    :mod:`dresta.resolver`.
+    """
+    default_error_messages = {
+        "invalid": "Not a valid key."
+    }
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        value = self._get_value(value)
+        if isinstance(value, self._cast):
+            return value
+        if value is True or value is False \
+                or not isinstance(value, (str, int)):
+            raise self.make_error("invalid")
+        return ModelRef(self._cast, value)
+
+
+class ListCast(fields.List):
+    """
+    Deserializes each item of a list, and casts the list to the given type
+    """
+    def __init__(self, cast: type, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cast = cast
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        result = super()._deserialize(value, attr, data, **kwargs)
+        if self._cast is list:
+            return result
+        return self._cast(result)
+
+
+def _unwrap_items(value: list) -> list:
+    """
+    Take the last value of the items that are query dict lists, as
+    :class:`QueryDictRawCast` does
+    """
+    return [
+        v[-1] if isinstance(v, (list, tuple)) and v else v
+        for v in value
+    ]
+
+
+class NumberListCast(RawCast):
+    """
+    Casts a list of numbers in bulk
+
+    Every item is cast with the item type in one pass. Only when that fails
+    is each item checked to report which ones are invalid.
+    """
+    default_error_messages = {
+        "invalid": "Not a valid list.",
+        "invalid_item": "Not a valid number.",
+        "too_large": "Number too large."
+    }
+
+    def __init__(self, cast: type, item: type, *args, **kwargs):
+        super().__init__(cast, *args, **kwargs)
+        self._item = item
+
+    def _item_errors(self, value) -> dict:
+        errors = {}
+        for i, v in enumerate(value):
+            if v is True or v is False:
+                errors[i] = [self.error_messages["invalid_item"]]
+                continue
+            try:
+                self._item(v)
+            except (TypeError, ValueError):
+                errors[i] = [self.error_messages["invalid_item"]]
+            except OverflowError:
+                errors[i] = [self.error_messages["too_large"]]
+        return errors
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if not isinstance(value, (list, tuple)):
+            raise self.make_error("invalid")
+
+        types = set(map(type, value))
+        if list in types or tuple in types:
+            value = _unwrap_items(value)
+            types = set(map(type, value))
+        if bool in types:
+            raise ValidationError(self._item_errors(value))
+        if types <= {self._item}:
+            items = list(value)
+        else:
+            try:
+                items = list(map(self._item, value))
+            except (TypeError, ValueError, OverflowError) as error:
+                raise ValidationError(self._item_errors(value)) from error
+
+        if self._cast is list:
+            return items
+        return self._cast(items)
+
+
+class ArrayCast(RawCast):
+    """
+    Loads a numeric array in bulk
+
+    The items are loaded into an array with the typecode of the array type
+    in one pass. Only when that fails is each item checked to report which
+    ones are invalid. Nested lists are flattened according to the shape of
+    the array, see :class:`dresta.arrays.Array`.
+    """
+    default_error_messages = {
+        "invalid": "Not a valid array.",
+        "invalid_item": "Not a valid number.",
+        "too_large": "Number too large.",
+        "too_short": "Shorter than minimum length {min}.",
+        "too_long": "Longer than maximum length {max}.",
+        "invalid_shape": "Not a valid array of shape {shape}.",
+    }
+
+    def __init__(self, cast: type, *args, **kwargs):
+        super().__init__(cast, *args, **kwargs)
+        self._dtype = getattr(cast, 'dtype', 'd')
+        self._shape = getattr(cast, 'shape', None)
+        self._min = getattr(cast, 'min_length', None)
+        self._max = getattr(cast, 'max_length', None)
+        self._convert = float if self._dtype in 'fd' else int
+
+        # Number of items in each row of the first dimension
+        self._row = 1
+        for dim in (self._shape or ())[1:]:
+            self._row *= dim
+
+    def _item_errors(self, value) -> dict:
+        errors = {}
+        for i, v in enumerate(value):
+            if v is True or v is False:
+                errors[i] = [self.error_messages["invalid_item"]]
+                continue
+            try:
+                if isinstance(v, str):
+                    v = self._convert(v)
+                array.array(self._dtype, [v])
+            except (TypeError, ValueError):
+                errors[i] = [self.error_messages["invalid_item"]]
+            except OverflowError:
+                errors[i] = [self.error_messages["too_large"]]
+        return errors
+
+    def _flatten(self, value: list) -> list:
+        """
+        Flatten nested rows into a flat list of items
+        """
+        flat = value
+        for dim in self._shape[1:]:
+            if not set(map(type, flat)) <= {list, tuple} \
+                    or set(map(len, flat)) - {dim}:
+                raise self.make_error("invalid_shape", shape=self._shape)
+            flat = list(itertools.chain.from_iterable(flat))
+        return flat
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if isinstance(value, str):
+            value = value.split(',')
+        elif isinstance(value, (list, tuple)) and len(value) == 1 \
+                and isinstance(value[0], str):
+            # A single query string value of comma separated numbers
+            value = value[0].split(',')
+        if not isinstance(value, (list, tuple)):
+            raise self.make_error("invalid")
+
+        if self._row > 1 and value \
+                and isinstance(value[0], (list, tuple)):
+            value = self._flatten(value)
+        elif len(value) % self._row:
+            raise self.make_error("invalid_shape", shape=self._shape)
+
+        length = len(value) // self._row
+        if self._min is not None and length < self._min:
+            raise self.make_error("too_short", min=self._min)
+        if self._max is not None and length > self._max:
+            raise self.make_error("too_long", max=self._max)
+
+        types = set(map(type, value))
+        if list in types or tuple in types:
+            value = _unwrap_items(value)
+            types = set(map(type, value))
+        if bool in types:
+            raise ValidationError(self._item_errors(value))
+        try:
+            if str in types:
+                result = self._cast(self._dtype, map(self._convert, value))
+            else:
+                result = self._cast(self._dtype, value)
+        except (TypeError, ValueError, OverflowError) as error:
+            raise ValidationError(self._item_errors(value)) from error
+
+        if self._shape is not None:
+            result.shape = (length,) + self._shape[1:]
+        return result
+
+
+class DictCast(fields.Dict):
+    """
+    Deserializes the keys and values of a dict, and casts the dict to the
+    given type
+    """
+    def __init__(self, cast: type, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cast = cast
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        result = super()._deserialize(value, attr, data, **kwargs)
+        if self._cast is dict:
+            return result
+        return self._cast(result)
+
+
 class NestedCast(fields.Nested):
+    """
+    Casts the nested data to the given data type
+
+    The signature of the type is inspected once, so that values whose keys
+    already match the parameters of the type can be passed straight through
+    as keyword arguments.
+    """
     def __init__(self, cast: type, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._cast = cast
+        self._sig: Optional[inspect.Signature] = None
+        self._direct = False
+        self._names: Optional[frozenset] = None
+        self._required: frozenset = frozenset()
+
+        try:
+            self._sig = inspect.signature(cast)
+        except (TypeError, ValueError):
+            # The signature is looked up again when casting to report the
+            # error
+            return
+
+        params = self._sig.parameters.values()
+        if any(p.kind in (p.POSITIONAL_ONLY, p.VAR_POSITIONAL)
+               for p in params):
+            return
+        if not any(p.kind == p.VAR_KEYWORD for p in params):
+            self._names = frozenset(p.name for p in params)
+        self._required = frozenset(
+            p.name for p in params
+            if p.default is p.empty and p.kind != p.VAR_KEYWORD
+        )
+        self._direct = True
 
     def cast(self, value):
         try:
-            sig = inspect.signature(self._cast)
+            if self._direct:
+                keys = value.keys()
+                if self._required <= keys \
+                        and (self._names is None or keys <= self._names):
+                    return self._cast(**value)
+            sig = self._sig or inspect.signature(self._cast)
             bound = sig.bind(**value)
             return self._cast(*bound.args, **bound.kwargs)
         except Exception as e:
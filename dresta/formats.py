@@ -0,0 +1,228 @@
+"""
+Response formats
+
+Results that are lists of records repeat the keys of every record. An api
+can respond in a more compact format instead:
+
+* :code:`'json'`: the result as is (default)
+* :code:`'columnar'`: json where every list of records in the result is
+  converted into columns
+* :code:`'msgpack'`: columnar, encoded with msgpack, see
+  :mod:`dresta.packer`
+
+.. code-block:: python
+
+    @api(formats=['json', 'columnar', 'msgpack'])
+    def my_api(request: HttpRequest):
+        return {'data': [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}]}
+
+.. code-block:: text
+
+    GET /api/my_app/my_api/?_format=columnar
+    200 {"data": {"columns": ["id", "name"], "rows": [[1, "a"], [2, "b"]]}}
+
+The first format of an api is its default. When an api has more formats,
+the client picks one with the :code:`_format` query parameter (set with
+:code:`DRESTA_FORMAT_PARAM`), or with the :code:`Accept` header. The
+parameter is never passed to the api function, and naming a format that the
+api doesn't have is an error.
+
+Only the lists at the top level of the result are converted. Records are
+dicts, or objects that the json encoder converts into dicts.
+"""
+from operator import itemgetter
+
+from django.conf import settings
+
+from . import encoders
+from . import packer
+from .exceptions import NotAcceptableError
+
+from typing import Dict, List, Optional, Sequence, Union
+
+
+def columns(records: list):
+    """
+    Convert a list of records into columns
+
+    :param records: list of records
+
+    :return: :code:`{'columns': [...], 'rows': [[...]]}`, or the list as is
+        when it is not a list of records
+    """
+    if type(records) is not list or not records:
+        return records
+
+    t = type(records[0])
+    if set(map(type, records)) != {t}:
+        return records
+    if t is not dict:
+        convert = encoders.get_backend().encoder.converter(t)
+        if convert is None or type(convert(records[0])) is not dict:
+            return records
+        records = list(map(convert, records))
+
+    names = list(records[0])
+    if not names:
+        return records
+    if len(names) == 1:
+        name = names[0]
+        getter = lambda record: (record[name],)  # noqa: E731
+    else:
+        getter = itemgetter(*names)
+
+    try:
+        size = len(names)
+        if any(len(record) != size for record in records):
+            raise KeyError()
+        # Every record has the same keys
+        rows = list(map(getter, records))
+    except KeyError:
+        names = list(dict.fromkeys(
+            name for record in records for name in record
+        ))
+        rows = [
+            [record.get(name) for name in names]
+            for record in records
+        ]
+
+    return {'columns': names, 'rows': rows}
+
+
+def columnar(result: dict) -> dict:
+    """
+    Convert the lists of records in a result into columns
+
+    :param result: result
+
+    :return: columnar result
+    """
+    return {key: columns(value) for key, value in result.items()}
+
+
+class Format:
+    """
+    The base of all response formats
+    """
+    name: str = None
+    """name of the format"""
+    content_type: str = None
+    """content type of the response"""
+
+    def encode(self, result: dict) -> bytes:
+        """
+        Encode a dumped result
+
+        :param result: result
+
+        :return: encoded result
+        """
+        raise NotImplementedError()
+
+
+class JsonFormat(Format):
+    """
+    Encodes results with the json backend
+    """
+    name = 'json'
+
+    @property
+    def content_type(self):
+        return encoders.get_backend().content_type
+
+    def encode(self, result: dict) -> bytes:
+        return encoders.get_backend().dumps(result)
+
+
+class ColumnarFormat(JsonFormat):
+    """
+    Encodes columnar results with the json backend
+    """
+    name = 'columnar'
+
+    def encode(self, result: dict) -> bytes:
+        return encoders.get_backend().dumps(columnar(result))
+
+
+class MsgpackFormat(Format):
+    """
+    Encodes columnar results with msgpack
+    """
+    name = 'msgpack'
+    content_type = 'application/msgpack'
+    accept = ('application/msgpack', 'application/x-msgpack')
+
+    def encode(self, result: dict) -> bytes:
+        return packer.packb(
+            columnar(result), encoders.get_backend().encoder.convert
+        )
+
+
+FORMATS: Dict[str, Format] = {
+    f.name: f for f in (JsonFormat(), ColumnarFormat(), MsgpackFormat())
+}
+"""The formats by name"""
+
+DEFAULT_FORMATS = ('json',)
+DEFAULT_PARAM = '_format'
+
+
+def get_formats(
+        formats: Optional[Sequence[Union[str, Format]]]) -> List[Format]:
+    """
+    Get the formats of the :code:`formats` option of an api
+
+    :param formats: names of formats, or formats
+
+    :raises ValueError: when a format does not exist
+
+    :return: formats
+    """
+    result = []
+    for f in formats or DEFAULT_FORMATS:
+        if isinstance(f, str):
+            try:
+                f = FORMATS[f]
+            except KeyError:
+                raise ValueError("Unknown response format: %r" % f)
+        result.append(f)
+    return result
+
+
+def format_param() -> str:
+    """
+    The query parameter that picks the format of a response
+    """
+    return getattr(settings, 'DRESTA_FORMAT_PARAM', DEFAULT_PARAM)
+
+
+def negotiate(request, formats: List[Format]) -> Format:
+    """
+    Pick the format of a response
+
+    :param request: request
+    :param formats: formats of the api, the first is the default
+
+    :raises NotAcceptableError: when the requested format is not one of the
+        formats
+
+    :return: format
+    """
+    name = request.GET.get(format_param())
+    if name:
+        for f in formats:
+            if f.name == name:
+                return f
+        raise NotAcceptableError([f.name for f in formats])
+
+    accept = request.META.get('HTTP_ACCEPT')
+    if accept:
+        types = {
+            media.split(';', 1)[0].strip()
+            for media in accept.split(',')
+        }
+        for f in formats:
+            if types.intersection(getattr(f, 'accept', ())):
+                return f
+
+    return formats[0]
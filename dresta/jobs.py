@@ -0,0 +1,371 @@
+"""
+Background jobs
+
+An api function that takes a long time can run in the background, so that
+it does not hold up a web worker. The arguments are still validated with
+the request, and the response is a job that can be polled until its result
+is ready.
+
+.. code-block:: python
+
+    @api(background=True)
+    def report(request: HttpRequest, year: int):
+        ...
+
+.. code-block:: text
+
+    GET /api/my_app/report/?year=2020
+    202 {"id": "4b4c...", "status": "pending", "url": "/api/jobs/4b4c.../"}
+
+    GET /api/jobs/4b4c.../
+    200 {"id": "4b4c...", "status": "done", "result": {...}}
+
+The status view is added by :func:`dresta.include_all_api_patterns` and
+:func:`dresta.include_api_patterns` when any of their apis runs in the
+background.
+
+A job belongs to the user that submitted it, or else to its session, and
+can only be seen by its owner. Requests without a user or a session get
+jobs that anyone with the job id can see.
+
+The :code:`background` option of :meth:`dresta.decorators.api` accepts:
+
+* :code:`True`: run on the executor set with :code:`DRESTA_JOB_EXECUTOR`,
+  either :code:`'thread'` (default) or :code:`'process'`
+* :code:`'thread'` or :code:`'process'`: run on that executor
+* an :code:`Executor`
+
+Process pools let CPU heavy jobs use every core, but the arguments and the
+results must be picklable, and the api function is given
+:code:`request=None`. The number of workers is set with
+:code:`DRESTA_JOB_WORKERS`.
+
+Jobs are kept in the memory of the process that created them, and are
+removed :code:`DRESTA_JOB_EXPIRY` seconds (default an hour) after they
+finish.
+"""
+import time
+import uuid
+import asyncio
+import inspect
+import logging
+import threading
+
+from concurrent.futures import (
+    Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+)
+from importlib import import_module
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http.request import HttpRequest
+from django.http.response import HttpResponse
+from django.urls import path, reverse, NoReverseMatch
+
+from . import encoders
+from . import streaming
+from .exceptions import APIError, NotFoundError, InternalError, log_error
+from .selection import Selection
+
+from typing import Dict, Optional, Union
+
+
+DEFAULT_EXPIRY = 60 * 60
+URL_NAME = 'dresta_job'
+"""The url name of the job status view"""
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Job:
+    """
+    A call of an api function in the background
+
+    :param api: api view
+    :param owner: owner of the job, see :func:`job_owner`
+    """
+    def __init__(self, api, owner: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.name = api._qualname
+        self.owner = owner
+        self.status = PENDING
+        self.future: Optional[Future] = None
+        self.result: Optional[dict] = None
+        self.error: Optional[dict] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+
+    def toDict(self) -> dict:
+        # Process pools don't tell when a job starts, so ask its future
+        if self.status == PENDING and self.future is not None \
+                and self.future.running():
+            self.status = RUNNING
+        data = {
+            'id': self.id,
+            'status': self.status,
+        }
+        if self.status == DONE:
+            data['result'] = self.result
+        elif self.status == FAILED:
+            data['error'] = self.error
+        return data
+
+
+class JobStore:
+    """
+    Keeps jobs in memory until they expire
+    """
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    @property
+    def expiry(self) -> float:
+        return getattr(settings, 'DRESTA_JOB_EXPIRY', DEFAULT_EXPIRY)
+
+    def _sweep(self):
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        expiry = self.expiry
+        self._next_sweep = now + min(expiry, 60)
+        for key, job in list(self._jobs.items()):
+            if job.finished is not None and job.finished + expiry <= now:
+                del self._jobs[key]
+
+    def add(self, job: Job):
+        with self._lock:
+            self._sweep()
+            self._jobs[job.id] = job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._sweep()
+            job = self._jobs.get(job_id)
+        if job is not None and job.finished is not None \
+                and job.finished + self.expiry <= time.time():
+            return None
+        return job
+
+
+store = JobStore()
+
+_executors: Dict[str, Executor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(kind: Union[bool, str, Executor]) -> Executor:
+    """
+    Get the executor of the :code:`background` option of an api
+
+    :param kind: background option
+
+    :return: executor
+    """
+    if isinstance(kind, Executor):
+        return kind
+    if kind is True:
+        kind = getattr(settings, 'DRESTA_JOB_EXECUTOR', 'thread')
+    if kind not in ('thread', 'process'):
+        raise ValueError("Invalid background option: %r" % (kind,))
+    try:
+        return _executors[kind]
+    except KeyError:
+        pass
+    with _executors_lock:
+        if kind not in _executors:
+            workers = getattr(settings, 'DRESTA_JOB_WORKERS', None)
+            if kind == 'process':
+                _executors[kind] = ProcessPoolExecutor(max_workers=workers)
+            else:
+                _executors[kind] = ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix='dresta-job'
+                )
+        return _executors[kind]
+
+
+def call(api, args: tuple, kwargs: dict,
+         selection: Optional[Selection] = None):
+    """
+    Call an api function and dump its result
+
+    Coroutines are run to completion, and streams are collected.
+
+    :param api: api view
+    :param args: arguments
+    :param kwargs: keyword arguments
+    :param selection: selected fields of the result
+
+    :return: dumped result
+    """
+    result = api.func(*args, **kwargs)
+    if inspect.isawaitable(result):
+        result = asyncio.run(result)
+    if streaming.isstream(result):
+        if not isinstance(result, streaming.Stream):
+            result = streaming.Stream(result)
+        schema = api._schema(selection)
+        if result.is_async:
+            return asyncio.run(streaming.acollect(result, schema))
+        return streaming.collect(result, schema)
+    return api._dump(result, selection)
+
+
+def _call_in_process(module: str, qualname: str, args: tuple,
+                     kwargs: dict, selection: Optional[Selection]):
+    """
+    Call an api function in a worker process
+
+    The api is looked up by name, since the api view replaces its function
+    in the module, and can't be pickled by reference.
+    """
+    api = import_module(module)
+    for name in qualname.split('.'):
+        api = getattr(api, name)
+    return call(api, args, kwargs, selection)
+
+
+def _call_in_thread(job: Job, api, args: tuple, kwargs: dict,
+                    selection: Optional[Selection]):
+    job.status = RUNNING
+    try:
+        return call(api, args, kwargs, selection)
+    finally:
+        close_old_connections()
+
+
+def job_owner(request: HttpRequest, create: bool = False) -> Optional[str]:
+    """
+    The owner of the jobs of a request, which is the authenticated user, or
+    else the session
+
+    :param request: request
+    :param create: whether to create a session if there is none yet
+
+    :return: owner, or :code:`None` if the request has neither
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return 'user:%s' % user.pk
+    session = getattr(request, 'session', None)
+    if session is None:
+        return None
+    if session.session_key is None and create:
+        session.save()
+        # Have the session middleware send the cookie
+        session.modified = True
+    if session.session_key is None:
+        return None
+    return 'session:%s' % session.session_key
+
+
+def submit(api, request: HttpRequest, bound: inspect.BoundArguments,
+           selection: Optional[Selection] = None) -> Job:
+    """
+    Run an api function in the background
+
+    :param api: api view
+    :param request: request
+    :param bound: validated arguments
+    :param selection: selected fields of the result
+
+    :return: job
+    """
+    job = Job(api, job_owner(request, create=True))
+    store.add(job)
+
+    if isinstance(api.executor, ProcessPoolExecutor):
+        if 'request' in bound.arguments:
+            bound.arguments['request'] = None
+        future = api.executor.submit(
+            _call_in_process, api.func.__module__, api.func.__qualname__,
+            bound.args, bound.kwargs, selection
+        )
+        job.future = future
+    else:
+        future = api.executor.submit(
+            _call_in_thread, job, api, bound.args, bound.kwargs, selection
+        )
+    future.add_done_callback(lambda future: _finish(job, future))
+    return job
+
+
+def _finish(job: Job, future: Future):
+    job.future = None
+    try:
+        job.result = future.result()
+        job.status = DONE
+    except APIError as error:
+        job.error = error.details
+        job.status = FAILED
+    except Exception:
+        logging.getLogger(__name__).exception(
+            "Internal Error in job %s of %s", job.id, job.name
+        )
+        job.error = InternalError().details
+        job.status = FAILED
+    job.finished = time.time()
+
+
+def job_data(job: Job) -> dict:
+    """
+    The status of a job, with the url of its status view
+
+    :param job: job
+
+    :return: status
+    """
+    data = job.toDict()
+    try:
+        data['url'] = reverse(URL_NAME, kwargs={'job': job.id})
+    except NoReverseMatch:
+        pass
+    return data
+
+
+def job_response(request: HttpRequest, job: Job,
+                 status: int = 200) -> HttpResponse:
+    """
+    Create the response of a job
+
+    :param request: request
+    :param job: job
+    :param status: status code
+
+    :return: response
+    """
+    backend = encoders.get_backend()
+    return HttpResponse(
+        backend.dumps(job_data(job)),
+        content_type=backend.content_type,
+        status=status
+    )
+
+
+class JobView:
+    """
+    The status view of background jobs
+    """
+    def __call__(self, request: HttpRequest, job: str):
+        found = store.get(job)
+        if found is not None and found.owner is not None \
+                and found.owner != job_owner(request):
+            found = None
+        if found is None:
+            error = NotFoundError(detail="Job Not Found", job=job)
+            response = error.response()
+            log_error(request, response, error)
+            return response
+        return job_response(request, found)
+
+    @property
+    def urlpattern(self):
+        """
+        The urlpattern of the status view
+        """
+        return path('jobs/<str:job>/', self, name=URL_NAME)
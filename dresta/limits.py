@@ -0,0 +1,403 @@
+"""
+Limits on the requests of api views
+
+Requests over a limit are rejected before their parameters are parsed, with
+a :class:`dresta.exceptions.RateLimitError` or a
+:class:`dresta.exceptions.OverloadedError` whose response is encoded once.
+Unlike other errors, they are sent with status 429 and 503, and a
+:code:`Retry-After` header, so that proxies and clients back off.
+
+.. code-block:: python
+
+    # At most 4 requests run at once, and 16 more may wait for them
+    @api(concurrency=ConcurrencyLimit(4, queue=16))
+    def export(request: HttpRequest):
+        ...
+
+    # 10 requests per minute per client
+    @api(rate='10/m')
+    def search(request: HttpRequest, q: str):
+        ...
+
+The :code:`concurrency` option of :meth:`dresta.decorators.api` accepts a
+number of requests, or a :class:`ConcurrencyLimit`. A limit only holds in
+the process it was created in, as does the pool of workers it protects.
+Streamed responses give up their slot when they start streaming.
+
+Limits hold for the calls of batch requests as well, where each call takes
+a token and a slot, and a call over a limit fails on its own.
+
+The :code:`rate` option accepts a string like :code:`'10/s'`, :code:`'100/m'`
+or :code:`'1000/h'`, a tuple of the rate per second and the burst, or a
+:class:`RateLimit`. Each client has its own token bucket, and clients are
+told how many seconds to wait before retrying. A client is the
+authenticated user, or else the IP address.
+
+Rate limits are kept in the process by default. To share them between
+the worker processes of a host, set :code:`DRESTA_RATE_CACHE` to the alias of
+a django cache that is shared between them, or use a
+:class:`CacheRateLimit`. The cache counts requests in fixed windows of
+:code:`burst / rate` seconds, since its atomic operations can't refill a
+bucket.
+"""
+import re
+import math
+import time
+import asyncio
+import threading
+
+from collections import deque
+from concurrent import futures
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http.request import HttpRequest
+
+from .exceptions import OverloadedError, RateLimitError
+
+from typing import Callable, Deque, Dict, Optional, Tuple, Union
+
+
+DEFAULT_TIMEOUT = 5.0
+
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_RATE = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\w*\s*$')
+
+ClientKey = Union[str, Callable[[HttpRequest], str]]
+
+
+class ConcurrencyLimit:
+    """
+    Limits the requests of an api that run at once
+
+    Requests over the limit wait in a queue for a free slot, in the order
+    they arrived. Waiting requests don't hold a worker of the event loop,
+    but do hold their thread under WSGI.
+
+    :param limit: maximum number of requests that run at once
+    :param queue: maximum number of requests that wait for a slot
+    :param timeout: seconds a request waits for a slot, defaults to the
+        :code:`DRESTA_QUEUE_TIMEOUT` setting
+    """
+    def __init__(self, limit: int, queue: int = 0,
+                 timeout: Optional[float] = None):
+        if limit < 1:
+            raise ValueError("The concurrency limit must be at least 1")
+        self.limit = limit
+        self.queue = queue
+        if timeout is None and settings.configured:
+            timeout = getattr(settings, 'DRESTA_QUEUE_TIMEOUT', None)
+        self.timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+        self.active = 0
+        self.rejected = 0
+        self._waiting: Deque[futures.Future] = deque()
+        self._lock = threading.Lock()
+
+    def _enter(self) -> Optional[futures.Future]:
+        """
+        Take a slot, or a place in the queue
+
+        :return: a future that resolves when a slot is handed over, or
+            :code:`None` if a slot was taken
+
+        :raises OverloadedError: when the queue is full
+        """
+        with self._lock:
+            if self.active < self.limit:
+                self.active += 1
+                return None
+            if len(self._waiting) >= self.queue:
+                self.rejected += 1
+                raise OverloadedError()
+            waiter = futures.Future()
+            self._waiting.append(waiter)
+            return waiter
+
+    def _leave(self, waiter: futures.Future):
+        """
+        Leave the queue, giving up the slot if it was handed over already
+
+        :param waiter: place in the queue
+        """
+        with self._lock:
+            try:
+                self._waiting.remove(waiter)
+                handed = False
+            except ValueError:
+                handed = not waiter.cancelled()
+            self.rejected += 1
+        if handed:
+            self.release()
+
+    def acquire(self):
+        """
+        Take a slot, waiting for one if they are all taken
+
+        :raises OverloadedError: when the queue is full, or no slot was
+            free in time
+        """
+        waiter = self._enter()
+        if waiter is None:
+            return
+        try:
+            waiter.result(self.timeout)
+        except futures.TimeoutError:
+            self._leave(waiter)
+            raise OverloadedError()
+
+    async def aacquire(self):
+        """
+        Take a slot, waiting for one if they are all taken
+
+        :raises OverloadedError: when the queue is full, or no slot was
+            free in time
+        """
+        waiter = self._enter()
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(
+                asyncio.wrap_future(waiter), self.timeout
+            )
+        except asyncio.TimeoutError:
+            self._leave(waiter)
+            raise OverloadedError()
+        except asyncio.CancelledError:
+            self._leave(waiter)
+            raise
+
+    def release(self):
+        """
+        Give up a slot, handing it to the first request in the queue
+        """
+        with self._lock:
+            while self._waiting:
+                waiter = self._waiting.popleft()
+                # Requests that stopped waiting are cancelled
+                if waiter.set_running_or_notify_cancel():
+                    waiter.set_result(None)
+                    return
+            self.active -= 1
+
+    def toDict(self) -> dict:
+        with self._lock:
+            return {
+                'active': self.active,
+                'waiting': len(self._waiting),
+                'rejected': self.rejected,
+            }
+
+
+def client_key(request: HttpRequest) -> str:
+    """
+    The key of the client of a request, which is the authenticated user, or
+    else the IP address
+
+    :param request: request
+
+    :return: client key
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return 'user:%s' % user.pk
+    return _ip_key(request)
+
+
+def _ip_key(request: HttpRequest) -> str:
+    return 'ip:%s' % request.META.get('REMOTE_ADDR', '')
+
+
+class RateLimit:
+    """
+    Limits the requests of each client with a token bucket
+
+    A bucket holds up to :code:`burst` tokens, and is refilled with
+    :code:`rate` tokens per second. Each request takes a token.
+
+    :param rate: requests per second
+    :param burst: maximum number of requests at once, defaults to the rate
+    :param key: function that returns the client of a request, or
+        :code:`'ip'` to only use the IP address
+    """
+    max_clients = 10000
+    """The number of buckets over which full buckets are dropped"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None,
+                 key: Optional[ClientKey] = None):
+        if rate <= 0:
+            raise ValueError("The rate must be positive")
+        self.rate = rate
+        self.burst = burst or max(1, math.ceil(rate))
+        if key == 'ip':
+            key = _ip_key
+        self.key: Callable[[HttpRequest], str] = key or client_key
+        self.rejected = 0
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._prune_at = self.max_clients
+        self._lock = threading.Lock()
+
+    @property
+    def blocking(self) -> bool:
+        """
+        Whether checking a request may block, on loading its user from the
+        database or on a cache
+        """
+        return self.key is not _ip_key
+
+    def take(self, client: str) -> float:
+        """
+        Take a token from the bucket of a client
+
+        :param client: client key
+
+        :return: :code:`0` if a token was taken, otherwise the seconds until
+            there is one
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+            if tokens < 1:
+                self._buckets[client] = (tokens, now)
+                self.rejected += 1
+                return (1 - tokens) / self.rate
+            self._buckets[client] = (tokens - 1, now)
+            if len(self._buckets) > self._prune_at:
+                self._prune(now)
+        return 0
+
+    def _prune(self, now: float):
+        """
+        Drop the buckets that are full again
+        """
+        self._buckets = {
+            client: (tokens, stamp)
+            for client, (tokens, stamp) in self._buckets.items()
+            if tokens + (now - stamp) * self.rate < self.burst
+        }
+        # Don't prune on every request while many clients are limited
+        self._prune_at = max(self.max_clients, 2 * len(self._buckets))
+
+    def check(self, request: HttpRequest):
+        """
+        Take a token for a request
+
+        :param request: request
+
+        :raises RateLimitError: when the client has no tokens left
+        """
+        wait = self.take(self.key(request))
+        if wait:
+            raise RateLimitError(math.ceil(wait))
+
+    def toDict(self) -> dict:
+        with self._lock:
+            return {
+                'clients': len(self._buckets),
+                'rejected': self.rejected,
+            }
+
+
+class CacheRateLimit(RateLimit):
+    """
+    Limits the requests of each client in a django cache, so that the limit
+    holds across processes
+
+    Requests are counted in fixed windows of :code:`burst / rate` seconds,
+    and each window allows :code:`burst` requests.
+
+    :param rate: requests per second
+    :param burst: maximum number of requests per window, defaults to the
+        rate
+    :param key: function that returns the client of a request, or
+        :code:`'ip'` to only use the IP address
+    :param cache: alias of the django cache
+    :param prefix: prefix of the cache keys
+    """
+    def __init__(self, rate: float, burst: Optional[int] = None,
+                 key: Optional[ClientKey] = None, cache: str = 'default',
+                 prefix: str = 'dresta:rate'):
+        super().__init__(rate, burst, key)
+        self.cache = caches[cache]
+        self.prefix = prefix
+        self.window = self.burst / self.rate
+
+    @property
+    def blocking(self) -> bool:
+        return True
+
+    def take(self, client: str) -> float:
+        now = time.time()
+        window = math.floor(now / self.window)
+        key = '%s:%s:%d' % (self.prefix, client, window)
+        timeout = math.ceil(self.window) + 1
+        self.cache.add(key, 0, timeout)
+        try:
+            count = self.cache.incr(key)
+        except ValueError:
+            # The window expired between adding and incrementing it
+            self.cache.add(key, 1, timeout)
+            count = 1
+        if count <= self.burst:
+            return 0
+        self.rejected += 1
+        return (window + 1) * self.window - now
+
+    def toDict(self) -> dict:
+        return {'rejected': self.rejected}
+
+
+def parse_rate(rate: str) -> Tuple[float, int]:
+    """
+    Parse a rate like :code:`'10/s'`, :code:`'100/m'`, or :code:`'5/10m'`
+
+    :param rate: rate
+
+    :return: requests per second, and burst
+    """
+    match = _RATE.match(rate)
+    if match is None:
+        raise ValueError("Invalid rate: %r" % (rate,))
+    count, periods, unit = match.groups()
+    seconds = int(periods or 1) * _PERIODS[unit]
+    return int(count) / seconds, int(count)
+
+
+def get_rate_limit(option: Union[str, Tuple[float, int], RateLimit, None],
+                   prefix: str = 'dresta:rate') -> Optional[RateLimit]:
+    """
+    Get the rate limit of the :code:`rate` option of an api
+
+    :param option: rate option
+    :param prefix: prefix of the cache keys, when the limit is kept in the
+        :code:`DRESTA_RATE_CACHE` cache
+
+    :return: rate limit
+    """
+    if option is None or isinstance(option, RateLimit):
+        return option
+    if isinstance(option, str):
+        option = parse_rate(option)
+    if not isinstance(option, tuple):
+        raise TypeError("Invalid rate option: %r" % (option,))
+    cache = settings.configured \
+        and getattr(settings, 'DRESTA_RATE_CACHE', None)
+    if cache:
+        return CacheRateLimit(*option, cache=cache, prefix=prefix)
+    return RateLimit(*option)
+
+
+def get_concurrency_limit(option: Union[int, ConcurrencyLimit, None]
+                          ) -> Optional[ConcurrencyLimit]:
+    """
+    Get the concurrency limit of the :code:`concurrency` option of an api
+
+    :param option: concurrency option
+
+    :return: concurrency limit
+    """
+    if option is None or isinstance(option, ConcurrencyLimit):
+        return option
+    if isinstance(option, int) and not isinstance(option, bool):
+        return ConcurrencyLimit(option)
+    raise TypeError("Invalid concurrency option: %r" % (option,))
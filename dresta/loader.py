@@ -0,0 +1,145 @@
+"""
+Precompiled argument loaders
+
+A :class:`CompiledLoader` flattens a marshmallow schema into a list of load
+steps once, so that loading the arguments of a request does not need to
+instantiate a new schema and run the generic load machinery every time.
+"""
+from marshmallow import Schema, ValidationError, RAISE, INCLUDE, missing
+from marshmallow import fields
+
+from typing import Type, NamedTuple, Callable, Any, List
+
+
+class LoadStep(NamedTuple):
+    """
+    A single step of a compiled loader
+
+    :param name: key of the value in the raw data
+    :param attribute: key of the loaded value
+    :param cast: deserializer of the value
+    :param required: whether the value is required
+    :param default: default value, or :code:`missing`
+    """
+    name: str
+    attribute: str
+    cast: Callable[..., Any]
+    required: bool
+    default: Any
+
+
+class CompiledLoader:
+    """
+    Loads raw data into arguments using a precompiled plan
+
+    The loaded arguments and the errors raised are the same as what
+    :code:`schema().load(data)` would produce.
+
+    :param steps: load steps
+    :param unknown: how to handle unknown keys (:code:`RAISE`,
+        :code:`INCLUDE`, or :code:`EXCLUDE`)
+    :param error_messages: schema error messages
+    """
+    def __init__(self, steps: List[LoadStep], unknown: str = RAISE,
+                 error_messages: dict = None):
+        self.steps = steps
+        self.unknown = unknown
+        self.error_messages = error_messages or {
+            'unknown': 'Unknown field.'
+        }
+        self._names = frozenset(step.name for step in steps)
+        self._required_messages = {}
+        for step in steps:
+            messages = getattr(
+                getattr(step.cast, '__self__', None), 'error_messages',
+                fields.Field.default_error_messages
+            )
+            self._required_messages[step.name] = messages['required']
+
+    @staticmethod
+    def supports(schema: Type[Schema]) -> bool:
+        """
+        Check if a schema can be compiled
+
+        Schemas with hooks (pre/post load, schema validators, etc.) can not be
+        compiled, and should be loaded normally.
+
+        :param schema: schema class
+
+        :return: whether the schema can be compiled
+        """
+        return not any(schema._hooks.values())
+
+    @classmethod
+    def fromSchema(cls, schema: Type[Schema]) -> 'CompiledLoader':
+        """
+        Compile a schema into a loader
+
+        :param schema: schema class
+
+        :return: compiled loader
+        """
+        if not cls.supports(schema):
+            raise ValueError(
+                "Schema %s can not be compiled" % schema.__name__
+            )
+        instance = schema()
+        steps = []
+        for attr_name, field in instance.load_fields.items():
+            try:
+                default = field.load_default
+            except AttributeError:
+                default = field.missing
+            steps.append(LoadStep(
+                name=field.data_key if field.data_key is not None
+                else attr_name,
+                attribute=field.attribute or attr_name,
+                cast=field.deserialize,
+                required=field.required,
+                default=default
+            ))
+        return cls(steps, instance.unknown, instance.error_messages)
+
+    def load(self, data: dict) -> dict:
+        """
+        Load the raw data
+
+        :param data: raw data
+
+        :raises ValidationError: when the data is invalid
+
+        :return: loaded arguments
+        """
+        result = {}
+        errors = {}
+        for name, attribute, cast, required, default in self.steps:
+            value = data.get(name, missing)
+            if value is missing:
+                if required:
+                    errors[name] = [self._required_messages[name]]
+                    continue
+                if default is missing:
+                    continue
+                result[attribute] = default() if callable(default) \
+                    else default
+                continue
+            try:
+                result[attribute] = cast(value, name, data)
+            except ValidationError as error:
+                errors[name] = error.messages
+                if error.valid_data:
+                    result[attribute] = error.valid_data
+
+        if self.unknown in (RAISE, INCLUDE):
+            for key in data:
+                if key in self._names:
+                    continue
+                if self.unknown == RAISE:
+                    errors[key] = [self.error_messages['unknown']]
+                else:
+                    result[key] = data[key]
+
+        if errors:
+            raise ValidationError(errors, data=data, valid_data=result)
+
+        return result
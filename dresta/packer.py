@@ -0,0 +1,145 @@
+"""
+A compact binary encoder
+
+Encodes results in the `MessagePack <https://msgpack.org>`_ format, so any
+msgpack library can decode them. Only encoding is supported, and objects
+that are not msgpack types are converted with the :code:`convert` function
+of a :class:`dresta.utils.JsonEncoder`.
+"""
+import struct
+
+from typing import Callable
+
+
+_pack_double = struct.Struct('>Bd').pack
+_pack_8 = struct.Struct('>BB').pack
+_pack_16 = struct.Struct('>BH').pack
+_pack_32 = struct.Struct('>BI').pack
+_pack_64 = struct.Struct('>BQ').pack
+_pack_i8 = struct.Struct('>Bb').pack
+_pack_i16 = struct.Struct('>Bh').pack
+_pack_i32 = struct.Struct('>Bi').pack
+_pack_i64 = struct.Struct('>Bq').pack
+
+
+def _pack_int(value: int) -> bytes:
+    if 0 <= value < 0x80:
+        return bytes((value,))
+    if -0x20 <= value < 0:
+        return bytes((value & 0xff,))
+    if value >= 0:
+        if value <= 0xff:
+            return _pack_8(0xcc, value)
+        if value <= 0xffff:
+            return _pack_16(0xcd, value)
+        if value <= 0xffffffff:
+            return _pack_32(0xce, value)
+        if value <= 0xffffffffffffffff:
+            return _pack_64(0xcf, value)
+    else:
+        if value >= -0x80:
+            return _pack_i8(0xd0, value)
+        if value >= -0x8000:
+            return _pack_i16(0xd1, value)
+        if value >= -0x80000000:
+            return _pack_i32(0xd2, value)
+        if value >= -0x8000000000000000:
+            return _pack_i64(0xd3, value)
+    raise OverflowError("Integer too large to pack: %d" % value)
+
+
+def _pack_header(size: int, fix: int, fix_max: int, codes) -> bytes:
+    if size <= fix_max:
+        return bytes((fix | size,))
+    code8, code16, code32 = codes
+    if code8 is not None and size <= 0xff:
+        return _pack_8(code8, size)
+    if size <= 0xffff:
+        return _pack_16(code16, size)
+    if size <= 0xffffffff:
+        return _pack_32(code32, size)
+    raise OverflowError("Object too large to pack")
+
+
+_STR = (0xd9, 0xda, 0xdb)
+_BIN = (0xc4, 0xc5, 0xc6)
+_ARRAY = (None, 0xdc, 0xdd)
+_MAP = (None, 0xde, 0xdf)
+
+
+def packb(obj, default: Callable[[object], object]) -> bytes:
+    """
+    Encode an object
+
+    :param obj: object
+    :param default: converts objects that are not msgpack types, raising
+        :code:`TypeError` when they can't be
+
+    :return: encoded object
+    """
+    out = bytearray()
+    write = out.extend
+    # Converted types are looked up once per call
+    converted = {}
+
+    def pack(obj):
+        t = type(obj)
+        if t is str:
+            data = obj.encode('utf-8')
+            size = len(data)
+            if size < 32:
+                out.append(0xa0 | size)
+            else:
+                write(_pack_header(size, 0xa0, 31, _STR))
+            write(data)
+        elif t is int:
+            write(_pack_int(obj))
+        elif t is float:
+            write(_pack_double(0xcb, obj))
+        elif obj is None:
+            out.append(0xc0)
+        elif obj is True:
+            out.append(0xc3)
+        elif obj is False:
+            out.append(0xc2)
+        elif t is list or t is tuple:
+            size = len(obj)
+            if size < 16:
+                out.append(0x90 | size)
+            else:
+                write(_pack_header(size, 0x90, 15, _ARRAY))
+            for item in obj:
+                pack(item)
+        elif t is dict:
+            size = len(obj)
+            if size < 16:
+                out.append(0x80 | size)
+            else:
+                write(_pack_header(size, 0x80, 15, _MAP))
+            for key, value in obj.items():
+                pack(key)
+                pack(value)
+        elif t is bytes or t is bytearray:
+            write(_pack_header(len(obj), 0, -1, _BIN))
+            write(obj)
+        else:
+            _pack_other(obj, t)
+
+    def _pack_other(obj, t):
+        base = converted.get(t)
+        if base is None:
+            # Subclasses of msgpack types are packed as their base type
+            for base in (int, float, str, bytes, bytearray, list, tuple,
+                         dict):
+                if issubclass(t, base):
+                    break
+            else:
+                base = False
+            converted[t] = base
+        if base is False:
+            pack(default(obj))
+        else:
+            pack(base(obj))
+
+    pack(obj)
+    return bytes(out)
@@ -2,34 +2,111 @@
 Parsers for api related inputs.
 """
 import re
+import functools
 
 from django.http import QueryDict
 
+from typing import Tuple, Union
+
+
+_SUB_KEY = re.compile(r"\[(.*?)\]")
+_INDEX = re.compile(r"[0-9]+")
+
+
+@functools.lru_cache(maxsize=1024)
+def splitKey(key: str) -> Tuple[Union[str, int], ...]:
+    """
+    Split a querydict key into its path
+
+    Numeric sub keys are converted into list indices.
+
+    .. code-block:: python
+
+        >>> splitKey('filter[a][0]')
+        ('filter', 'a', 0)
+
+    :param key: raw key
+
+    :return: path of the key
+    """
+    sub_keys = _SUB_KEY.findall(key)
+    return (key.split('[', 1)[0],) + tuple(
+        int(sub) if _INDEX.fullmatch(sub) else sub
+        for sub in sub_keys
+    )
+
+
+def _listify(root: dict):
+    """
+    Convert every dict whose keys are the indices 0 to n - 1 into a list
+
+    Dicts with gaps in their indices, or that mix indices with other keys,
+    keep the indices as strings, so that items are never moved to another
+    index.
+
+    :param root: parsed querydict
+    """
+    # Collect all the nested dicts so that they can be converted from the
+    # bottom up
+    nodes = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for k, v in node.items():
+            if isinstance(v, dict):
+                nodes.append((node, k, v))
+                stack.append(v)
+
+    for parent, k, node in reversed(nodes):
+        if not any(isinstance(i, int) for i in node):
+            continue
+        if all(isinstance(i, int) and i < len(node) for i in node):
+            # The indices are unique, so they are 0 to n - 1
+            parent[k] = [node[i] for i in range(len(node))]
+        else:
+            parent[k] = {
+                str(i) if isinstance(i, int) else i: v
+                for i, v in node.items()
+            }
+
 
 def parseQueryDict(querydict: QueryDict) -> dict:
     """
     Parse a queryDict into a dictionary
 
+    Bracketed keys are parsed into nested dictionaries, and numeric sub keys
+    are parsed into lists. Indices with gaps are kept in a dictionary, which
+    fails the validation of a list.
+
+    .. code-block:: python
+
+        >>> parseQueryDict(QueryDict('a[b]=1&a[c]=2&l[0][id]=3'))
+        {'a': {'b': ['1'], 'c': ['2']}, 'l': [{'id': ['3']}]}
+        >>> parseQueryDict(QueryDict('l[5]=1'))
+        {'l': {'5': ['1']}}
+
     :param querydict: querydict
 
     :return: parsed querydict
     """
     parsed = dict()
-
-    def set_node(root, nodes, value):
-        if len(nodes) == 1:
-            root[nodes[0]] = value
-            return
-        if not nodes:
-            return
-        if nodes[0] not in root or not isinstance(root[nodes[0]], dict):
-            root[nodes[0]] = dict()
-        set_node(root[nodes[0]], nodes[1:], value)
+    indexed = False
 
     for k, v in querydict.lists():
-        key = k.split('[', 1)[0]
-        sub_keys = re.findall(r"\[(.*?)\]", k)
-        keys = [key] + sub_keys
-        set_node(parsed, keys, v)
+        keys = splitKey(k)
+        last = len(keys) - 1
+        node = parsed
+        for i in range(last):
+            key = keys[i]
+            child = node.get(key)
+            if not isinstance(child, dict):
+                child = node[key] = dict()
+            node = child
+        node[keys[last]] = v
+        if last and not indexed:
+            indexed = any(isinstance(key, int) for key in keys)
+
+    if indexed:
+        _listify(parsed)
 
     return parsed
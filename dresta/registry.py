@@ -0,0 +1,78 @@
+"""
+Registry of api views
+
+Every view created with :meth:`dresta.decorators.api` registers itself
+under the module of its function, so the api views of a module can be found
+without scanning all of its members.
+
+Discovery is configured with the :code:`DRESTA_DISCOVERY` setting:
+
+* :code:`'scan'` (default): inspect every member of the api module, which
+  also finds views that were imported from other modules.
+* :code:`'registry'`: use the views registered by the module, and only
+  scan modules that have not registered any.
+
+The request schemas of the views may be built on their first request by
+setting :code:`DRESTA_LAZY_SCHEMAS = True`, which speeds up startup. Call
+:func:`warm_up` to build them ahead of time instead.
+"""
+import time
+import logging
+
+from typing import Dict, List, Optional
+
+
+_modules: Dict[str, Dict[str, object]] = {}
+
+
+def register(view):
+    """
+    Register an api view under the module of its function
+
+    Registering a view with the same name again replaces it, as happens when
+    a module is reloaded.
+
+    :param view: api view
+    """
+    _modules.setdefault(view.func.__module__, {})[view.name] = view
+
+
+def get_module_views(module: str) -> Optional[List[object]]:
+    """
+    Get the views registered by a module
+
+    :param module: module name
+
+    :return: registered views, or :code:`None` if the module has none
+    """
+    views = _modules.get(module)
+    if not views:
+        return None
+    return list(views.values())
+
+
+def get_views() -> List[object]:
+    """
+    Get every registered view
+
+    :return: registered views
+    """
+    return [
+        view
+        for views in list(_modules.values())
+        for view in list(views.values())
+    ]
+
+
+def warm_up():
+    """
+    Build the request schemas of every registered view
+    """
+    start = time.perf_counter()
+    views = get_views()
+    for view in views:
+        view.build()
+    logging.getLogger(__name__).info(
+        "Built %d api schemas in %.1fms",
+        len(views), (time.perf_counter() - start) * 1000
+    )
@@ -0,0 +1,217 @@
+"""
+Model parameters
+
+An api function may take django models as parameters. The client gives
+their primary keys, and the instances are loaded before the api function is
+called.
+
+.. code-block:: python
+
+    @api(select_related={Book: ['author']})
+    def compare(request: HttpRequest, books: List[Book], shelf: Shelf):
+        ...
+
+.. code-block:: text
+
+    GET /api/my_app/compare/?books=1&books=2&books=3&shelf=4
+
+The keys of every model in the arguments, nested or not, are collected
+first, and each model is then loaded with a single :code:`in_bulk` query, so
+a list of models costs one query instead of one per item.
+
+Models are looked up by primary key, by the :code:`dresta_lookup` attribute
+of the model, or by the :code:`lookup` option of
+:meth:`dresta.decorators.api`. The lookup field must be unique.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Model
+
+from marshmallow import Schema, fields
+
+from .exceptions import ValidateError
+
+from typing import Dict, List, Optional, Sequence, Type, Union
+
+
+Hint = Union[Sequence[str], Dict[Type[Model], Sequence[str]], None]
+
+
+class ModelRef:
+    """
+    The key of a model instance that has not been loaded yet
+
+    :param model: model
+    :param key: lookup key
+    """
+    __slots__ = ('model', 'key', 'instance')
+
+    def __init__(self, model: Type[Model], key):
+        self.model = model
+        self.key = key
+        self.instance: Optional[Model] = None
+
+    def __repr__(self):
+        return 'ModelRef(%s, %r)' % (self.model.__name__, self.key)
+
+
+def has_model_fields(schema) -> bool:
+    """
+    Whether a schema has model fields, nested or not
+
+    :param schema: schema class or instance
+
+    :return: whether the schema loads models
+    """
+    from .fields import ModelCast
+
+    seen = set()
+
+    def check_schema(schema) -> bool:
+        if isinstance(schema, type):
+            schema = schema()
+        if type(schema) in seen:
+            return False
+        seen.add(type(schema))
+        return any(map(check_field, schema.fields.values()))
+
+    def check_field(field) -> bool:
+        if isinstance(field, ModelCast):
+            return True
+        if isinstance(field, fields.List):
+            return check_field(field.inner)
+        if isinstance(field, fields.Tuple):
+            return any(map(check_field, field.tuple_fields))
+        if isinstance(field, fields.Dict):
+            return field.value_field is not None \
+                and check_field(field.value_field)
+        if isinstance(field, fields.Nested):
+            nested = field.nested
+            if callable(nested) and not isinstance(nested, type):
+                nested = nested()
+            if isinstance(nested, (Schema, type)):
+                return check_schema(nested)
+        return False
+
+    return check_schema(schema)
+
+
+def _collect(value, path: tuple, refs: Dict[type, list], seen: set):
+    t = type(value)
+    if t is ModelRef:
+        refs[value.model].append((path, value))
+    elif t is dict:
+        for key, item in value.items():
+            _collect(item, path + (key,), refs, seen)
+    elif t is list or t is tuple:
+        for i, item in enumerate(value):
+            _collect(item, path + (i,), refs, seen)
+    elif t is set or t is frozenset:
+        for item in value:
+            _collect(item, path, refs, seen)
+    elif hasattr(value, '__dict__') and not isinstance(value, (Model, type)):
+        if id(value) in seen:
+            return
+        seen.add(id(value))
+        for key, item in vars(value).items():
+            _collect(item, path + (key,), refs, seen)
+
+
+def _replace(value, seen: set):
+    t = type(value)
+    if t is ModelRef:
+        return value.instance
+    if t is dict:
+        for key, item in value.items():
+            value[key] = _replace(item, seen)
+    elif t is list:
+        value[:] = [_replace(item, seen) for item in value]
+    elif t is tuple or t is set or t is frozenset:
+        return t(_replace(item, seen) for item in value)
+    elif hasattr(value, '__dict__') and not isinstance(value, (Model, type)):
+        if id(value) not in seen:
+            seen.add(id(value))
+            attrs = vars(value)
+            for key, item in attrs.items():
+                attrs[key] = _replace(item, seen)
+    return value
+
+
+def _hint(hint: Hint, model: Type[Model]) -> Optional[List[str]]:
+    if hint is None:
+        return None
+    if isinstance(hint, dict):
+        hint = hint.get(model)
+        if hint is None:
+            return None
+    return list(hint)
+
+
+def _add_error(errors: dict, path: tuple, message: str):
+    node = errors
+    for key in path[:-1]:
+        node = node.setdefault(key, {})
+    node.setdefault(path[-1], []).append(message)
+
+
+def resolve(arguments: dict,
+            lookup: Optional[Dict[Type[Model], str]] = None,
+            select_related: Hint = None,
+            only: Hint = None):
+    """
+    Load the models in the arguments of an api function
+
+    The keys of each model are loaded with one query, and replaced with the
+    instances in place.
+
+    :param arguments: arguments
+    :param lookup: lookup field by model
+    :param select_related: related fields to select, for every model or by
+        model
+    :param only: fields to load, for every model or by model
+
+    :raises ValidateError: when a key is invalid, or an instance does not
+        exist
+    """
+    refs: Dict[type, list] = defaultdict(list)
+    _collect(arguments, (), refs, set())
+    if not refs:
+        return
+
+    errors = {}
+    for model, items in refs.items():
+        name = (lookup or {}).get(model) \
+            or getattr(model, 'dresta_lookup', 'pk')
+        field = model._meta.pk if name == 'pk' \
+            else model._meta.get_field(name)
+
+        keys = set()
+        for path, ref in items:
+            try:
+                ref.key = field.to_python(ref.key)
+                keys.add(ref.key)
+            except DjangoValidationError:
+                ref.key = None
+                _add_error(errors, path, "Not a valid key.")
+
+        queryset = model._default_manager.all()
+        related = _hint(select_related, model)
+        if related:
+            queryset = queryset.select_related(*related)
+        fields_only = _hint(only, model)
+        if fields_only:
+            queryset = queryset.only(*fields_only, field.name)
+        instances = queryset.in_bulk(keys, field_name=name) if keys else {}
+
+        for path, ref in items:
+            if ref.key is None:
+                continue
+            ref.instance = instances.get(ref.key)
+            if ref.instance is None:
+                _add_error(errors, path, "Object does not exist.")
+
+    if errors:
+        raise ValidateError(errors, detail="Invalid Parameters")
+
+    _replace(arguments, set())
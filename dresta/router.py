@@ -0,0 +1,159 @@
+"""
+Dictionary based routing of api views
+
+By default, every api view gets its own url pattern, which django tests one
+after another when resolving a path. The router mounts a single catch-all
+pattern instead, and finds the api view in a dict. The urls stay the same,
+and unknown views are still a 404.
+
+The router is enabled with :code:`DRESTA_ROUTER = True`, or with the
+:code:`router` option of :func:`dresta.include_all_api_patterns` and
+:func:`dresta.include_api_patterns`.
+
+The urls of api views are found with :func:`reverse`, by app label for
+:func:`dresta.include_all_api_patterns`, or by module for
+:func:`dresta.include_api_patterns`:
+
+.. code-block:: python
+
+    from dresta.router import reverse
+
+    reverse('my_app', 'my_api')  # '/api/my_app/my_api/'
+    reverse('my_app.api', 'my_api')
+"""
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.http import Http404
+from django.http.request import HttpRequest
+from django.urls import NoReverseMatch, path, reverse as django_reverse
+from django.utils.http import urlencode
+
+from .views import markcoroutinefunction
+
+from typing import Dict, Optional
+
+
+URL_NAME = 'dresta_api'
+"""The url name of the catch-all pattern of every app"""
+
+ROUTER_URL_NAME = 'dresta_api.%s'
+"""The url name of the catch-all pattern of a router, by its label"""
+
+
+def use_router(router: Optional[bool] = None) -> bool:
+    """
+    Whether to route api views with a router
+
+    :param router: router option, defaults to the :code:`DRESTA_ROUTER`
+        setting
+
+    :return: whether to use a router
+    """
+    if router is None:
+        return getattr(settings, 'DRESTA_ROUTER', False)
+    return router
+
+
+class Router:
+    """
+    Dispatches requests to api views by name
+
+    If every api view is async, the router is async too. Otherwise async api
+    views are run with :code:`async_to_sync`.
+
+    :param views: api views by name
+    :param label: label that finds the views with :func:`reverse`, such as
+        the path of their module
+    """
+    def __init__(self, views: Dict[str, object],
+                 label: Optional[str] = None):
+        self.views = views
+        self.label = label
+        self.is_async = bool(views) and all(
+            view.is_async for view in views.values()
+        )
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _get_view(self, name: str):
+        try:
+            return self.views[name]
+        except KeyError:
+            raise Http404("Api %r does not exist" % name)
+
+    def __call__(self, request: HttpRequest, name: str):
+        view = self._get_view(name)
+        if self.is_async:
+            return view(request)
+        if view.is_async:
+            return async_to_sync(view)(request)
+        return view(request)
+
+    @property
+    def urlpattern(self):
+        """
+        The catch-all urlpattern of the router
+        """
+        name = None if self.label is None else ROUTER_URL_NAME % self.label
+        return path('<str:name>/', self, name=name)
+
+
+class AppRouter(Router):
+    """
+    Dispatches requests to the api views of every app
+
+    :param views: api views by app label and name
+    """
+    def __init__(self, views: Dict[str, Dict[str, object]]):
+        self.apps = views
+        super().__init__({
+            (app, name): view
+            for app, app_views in views.items()
+            for name, view in app_views.items()
+        })
+
+    def __call__(self, request: HttpRequest, app: str, name: str):
+        return super().__call__(request, (app, name))
+
+    def _get_view(self, key):
+        try:
+            return self.views[key]
+        except KeyError:
+            raise Http404("Api %r does not exist in %r" % (key[1], key[0]))
+
+    @property
+    def urlpattern(self):
+        return path('<str:app>/<str:name>/', self, name=URL_NAME)
+
+
+def reverse(app: str, name: str, urlconf=None, query: dict = None) -> str:
+    """
+    Get the url of an api view routed by a router
+
+    :param app: app label, or the label of a :class:`Router`, which is the
+        module path for :func:`dresta.include_api_patterns`
+    :param name: name of the api view
+    :param urlconf: urlconf to search, defaults to the current urlconf
+    :param query: query parameters to add to the url
+
+    :raises NoReverseMatch: when no router routes the api views of the app
+
+    :return: url
+    """
+    try:
+        url = django_reverse(
+            ROUTER_URL_NAME % app, urlconf=urlconf, kwargs={'name': name}
+        )
+    except NoReverseMatch:
+        try:
+            url = django_reverse(
+                URL_NAME, urlconf=urlconf, kwargs={'app': app, 'name': name}
+            )
+        except NoReverseMatch:
+            raise NoReverseMatch(
+                "No router routes the api views of %r" % app
+            ) from None
+    if query:
+        url += '?' + urlencode(query, doseq=True)
+    return url
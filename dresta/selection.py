@@ -0,0 +1,123 @@
+"""
+Sparse fieldsets
+
+Clients can ask for only some of the fields of a result with the
+:code:`fields` query parameter (set with :code:`DRESTA_FIELDS_PARAM`).
+Nested fields are separated with dots.
+
+.. code-block:: text
+
+    GET /api/my_app/book/?id=5&fields=title,author.name
+
+The selection is given to the result schema as :code:`only`, so the other
+fields are never dumped. An api function can also take a
+:class:`Selection` parameter, to skip work for fields nobody asked for:
+
+.. code-block:: python
+
+    @api(schema=BookSchema)
+    def book(request: HttpRequest, id: int, fields: Selection):
+        book = Book.objects.get(pk=id)
+        if 'reviews' in fields:
+            book.reviews = load_reviews(book)
+        return book
+
+Selections are only parsed for apis that have a result schema, or that take
+a :class:`Selection`.
+"""
+from django.conf import settings
+
+from typing import FrozenSet, Iterable, Optional
+
+
+DEFAULT_PARAM = 'fields'
+
+
+def fields_param() -> str:
+    """
+    The query parameter that selects the fields of a result
+    """
+    return getattr(settings, 'DRESTA_FIELDS_PARAM', DEFAULT_PARAM)
+
+
+class Selection:
+    """
+    The fields of a result that were asked for
+
+    :param fields: field paths, nested fields are separated with dots.
+        :code:`None` selects every field
+    """
+    __slots__ = ('fields', '_names')
+
+    def __init__(self, fields: Optional[Iterable[str]] = None):
+        self.fields: Optional[FrozenSet[str]] = None
+        self._names: FrozenSet[str] = frozenset()
+        if fields is not None:
+            self.fields = frozenset(fields)
+            self._names = frozenset(
+                name.split('.', 1)[0] for name in self.fields
+            )
+
+    @classmethod
+    def parse(cls, value) -> 'Selection':
+        """
+        Parse the value of the fields parameter
+
+        :param value: comma separated field paths, or a list of them
+
+        :raises ValueError: when the value is not a string or list of strings
+
+        :return: selection
+        """
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, (list, tuple)) \
+                or not all(isinstance(v, str) for v in value):
+            raise ValueError("Not a valid list of fields.")
+        return cls(
+            name.strip()
+            for v in value
+            for name in v.split(',')
+            if name.strip()
+        )
+
+    @property
+    def all(self) -> bool:
+        """
+        Whether every field is selected
+        """
+        return self.fields is None
+
+    def __contains__(self, name: str) -> bool:
+        """
+        Whether a field, or any of its nested fields, is selected
+        """
+        return self.fields is None or name in self._names
+
+    def __getitem__(self, name: str) -> 'Selection':
+        """
+        The selection of the nested fields of a field
+        """
+        if self.fields is None or name in self.fields:
+            return Selection()
+        prefix = name + '.'
+        return Selection(
+            path[len(prefix):]
+            for path in self.fields
+            if path.startswith(prefix)
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, Selection) and self.fields == other.fields
+
+    def __hash__(self):
+        return hash(self.fields)
+
+    def __repr__(self):
+        if self.fields is None:
+            return 'Selection()'
+        return 'Selection(%r)' % sorted(self.fields)
+
+
+ALL = Selection()
+"""The selection of every field"""
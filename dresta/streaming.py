@@ -0,0 +1,236 @@
+"""
+Streamed Json responses
+
+An api function may return a generator, an iterator, or a :class:`Stream`
+to have its result encoded incrementally instead of building the whole
+response in memory.
+
+.. code-block:: python
+
+    @api()
+    def export(request: HttpRequest):
+        return Stream(
+            Row.objects.values().iterator(),
+            name='rows',
+            exported=datetime.now()
+        )
+
+The above will stream :code:`{"exported": "...", "rows": [...]}`, one
+chunk of rows at a time.
+"""
+import inspect
+import logging
+
+import collections.abc
+
+from django.http.response import StreamingHttpResponse
+
+from marshmallow import Schema
+
+from . import encoders
+from .encoders import JsonBackend
+
+from typing import Iterable, Iterator, AsyncIterator, Optional, List
+
+
+class Stream:
+    """
+    Marks an iterable to be streamed as a Json array
+
+    :param iterable: items of the array, may also be an async iterable
+    :param name: when set, the array is wrapped in an object under this key
+    :param chunk_size: number of items to encode per chunk
+    :param envelope: other keys of the wrapping object
+    """
+    def __init__(self, iterable: Iterable, name: Optional[str] = None,
+                 chunk_size: int = 100, **envelope):
+        self.iterable = iterable
+        self.name = name
+        self.chunk_size = max(1, chunk_size)
+        self.envelope = envelope
+
+        if envelope and name is None:
+            raise ValueError("An envelope requires a name for the array")
+
+    @property
+    def is_async(self) -> bool:
+        """
+        Whether the items are given by an async iterable
+        """
+        return hasattr(self.iterable, '__aiter__')
+
+    def _head(self, backend: JsonBackend) -> bytes:
+        if self.name is None:
+            return b'['
+        head = [b'{']
+        for k, v in self.envelope.items():
+            head.append(backend.dumps(str(k)))
+            head.append(b': ')
+            head.append(backend.dumps(v))
+            head.append(b', ')
+        head.append(backend.dumps(self.name))
+        head.append(b': [')
+        return b''.join(head)
+
+    def _tail(self) -> bytes:
+        if self.name is None:
+            return b']'
+        return b']}'
+
+
+def isstream(result) -> bool:
+    """
+    Check if the result of an api function should be streamed
+
+    :param result: result
+
+    :return: whether the result is streamable
+    """
+    if isinstance(result, Stream):
+        return True
+    if isinstance(result, (str, bytes, dict)):
+        return False
+    return inspect.isgenerator(result) \
+        or inspect.isasyncgen(result) \
+        or isinstance(result, collections.abc.Iterator)
+
+
+def _encode_chunk(items: list, backend: JsonBackend,
+                  schema: Optional[Schema], first: bool) -> bytes:
+    if schema is not None:
+        items = [schema.dump(item) for item in items]
+    chunk = b', '.join([backend.dumps(item) for item in items])
+    if first:
+        return chunk
+    return b', ' + chunk
+
+
+def iterencode(stream: Stream,
+               schema: Optional[Schema] = None) -> Iterator[bytes]:
+    """
+    Incrementally encode a stream
+
+    :param stream: stream
+    :param schema: schema to dump each item with
+
+    :return: encoded chunks
+    """
+    backend = encoders.get_backend()
+    yield stream._head(backend)
+
+    first = True
+    items: List = []
+    try:
+        for item in stream.iterable:
+            items.append(item)
+            if len(items) >= stream.chunk_size:
+                yield _encode_chunk(items, backend, schema, first)
+                first = False
+                items = []
+        if items:
+            yield _encode_chunk(items, backend, schema, first)
+    except Exception:
+        # The response has already started, so the best we can do is to
+        # stop the stream, leaving the client with invalid json
+        logging.getLogger(__name__).exception("Internal Error while streaming")
+        return
+
+    yield stream._tail()
+
+
+async def aiterencode(stream: Stream,
+                      schema: Optional[Schema] = None) -> AsyncIterator[bytes]:
+    """
+    Incrementally encode a stream of an async iterable
+
+    :param stream: stream
+    :param schema: schema to dump each item with
+
+    :return: encoded chunks
+    """
+    backend = encoders.get_backend()
+    yield stream._head(backend)
+
+    first = True
+    items: List = []
+    try:
+        async for item in stream.iterable:
+            items.append(item)
+            if len(items) >= stream.chunk_size:
+                yield _encode_chunk(items, backend, schema, first)
+                first = False
+                items = []
+        if items:
+            yield _encode_chunk(items, backend, schema, first)
+    except Exception:
+        logging.getLogger(__name__).exception("Internal Error while streaming")
+        return
+
+    yield stream._tail()
+
+
+def _collected(stream: Stream, items: list):
+    if stream.name is None:
+        return items
+    collected = dict(stream.envelope)
+    collected[stream.name] = items
+    return collected
+
+
+def collect(result, schema: Optional[Schema] = None):
+    """
+    Collect a streamed result into memory
+
+    :param result: a :class:`Stream`, or an iterator
+    :param schema: schema to dump each item with
+
+    :return: list of items, or the wrapping object
+    """
+    if not isinstance(result, Stream):
+        result = Stream(result)
+    items = list(result.iterable)
+    if schema is not None:
+        items = [schema.dump(item) for item in items]
+    return _collected(result, items)
+
+
+async def acollect(result, schema: Optional[Schema] = None):
+    """
+    Collect a streamed result that may be async into memory
+
+    :param result: a :class:`Stream`, or an iterator
+    :param schema: schema to dump each item with
+
+    :return: list of items, or the wrapping object
+    """
+    if not isinstance(result, Stream):
+        result = Stream(result)
+    if not result.is_async:
+        return collect(result, schema)
+    items = [item async for item in result.iterable]
+    if schema is not None:
+        items = [schema.dump(item) for item in items]
+    return _collected(result, items)
+
+
+def response(result, schema: Optional[Schema] = None) -> StreamingHttpResponse:
+    """
+    Create a streaming response for the result of an api function
+
+    :param result: a :class:`Stream`, or an iterator
+    :param schema: schema to dump each item with
+
+    :return: streaming response
+    """
+    if not isinstance(result, Stream):
+        result = Stream(result)
+
+    if result.is_async:
+        content = aiterencode(result, schema)
+    else:
+        content = iterencode(result, schema)
+
+    return StreamingHttpResponse(
+        content,
+        content_type=encoders.get_backend().content_type
+    )
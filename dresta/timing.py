@@ -0,0 +1,301 @@
+"""
+Timing instrumentation of api calls
+
+Every api call is split into phases:
+
+* :code:`query`: parsing the query string
+* :code:`body`: parsing the json body
+* :code:`load`: loading the arguments
+* :code:`resolve`: loading the model arguments
+* :code:`view`: running the api function
+* :code:`dump`: dumping the result with the result schema
+* :code:`encode`: encoding the response
+* :code:`compress`: compressing the response
+
+The phases are only timed when instrumentation is enabled, which is when
+any of these are set:
+
+* :code:`DRESTA_SERVER_TIMING = True` adds a :code:`Server-Timing` header to
+  every api response.
+* :code:`DRESTA_STATS = True` aggregates the latency and errors of every
+  endpoint, which can be read with :func:`get_stats`.
+* An :class:`Observer` is registered with :func:`register_observer`.
+"""
+import math
+import time
+import threading
+
+from collections import deque
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http.response import HttpResponseBase
+
+from typing import Dict, List, Optional
+
+
+class Timer:
+    """
+    Records how long each phase of an api call takes
+
+    :param header: whether to add a :code:`Server-Timing` header
+    """
+    def __init__(self, header: bool = False):
+        self.header = header
+        self.start = self._last = time.perf_counter()
+        self.end: Optional[float] = None
+        self.phases: Dict[str, float] = {}
+        self.error = None
+
+    @property
+    def total(self) -> float:
+        """
+        Total duration in seconds
+        """
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def mark(self, phase: str):
+        """
+        Mark the end of a phase
+
+        The phase lasted since the end of the last phase.
+
+        :param phase: name of the phase
+        """
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0) + now - self._last
+        self._last = now
+
+    def skip(self):
+        """
+        Exclude the time since the last phase from the next phase
+        """
+        self._last = time.perf_counter()
+
+    def fail(self, error):
+        """
+        Record the error of the call
+
+        :param error: api error
+        """
+        self.error = error
+
+    def serverTiming(self) -> str:
+        """
+        The value of the :code:`Server-Timing` header
+
+        :return: header value
+        """
+        metrics = [
+            '%s;dur=%.3f' % (phase, duration * 1000)
+            for phase, duration in self.phases.items()
+        ]
+        metrics.append('total;dur=%.3f' % (self.total * 1000))
+        return ', '.join(metrics)
+
+    def finish(self, api, request, response: HttpResponseBase):
+        """
+        Finish timing the api call
+
+        :param api: api view
+        :param request: request
+        :param response: response
+        """
+        self.end = time.perf_counter()
+        if self.header:
+            response['Server-Timing'] = self.serverTiming()
+        for observer in _observers:
+            observer.observe(api, request, response, self)
+
+
+class NullTimer:
+    """
+    A timer that does nothing, used when instrumentation is disabled
+    """
+    def mark(self, phase: str):
+        pass
+
+    def skip(self):
+        pass
+
+    def fail(self, error):
+        pass
+
+    def finish(self, api, request, response: HttpResponseBase):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class Observer:
+    """
+    Observes every api call while registered
+    """
+    def observe(self, api, request, response: HttpResponseBase,
+                timer: Timer):
+        """
+        Called after an api call
+
+        :param api: api view
+        :param request: request
+        :param response: response
+        :param timer: timings of the call, :attr:`Timer.error` is set when
+            the call failed
+        """
+        raise NotImplementedError()
+
+
+class EndpointStats:
+    """
+    Aggregated statistics of an endpoint
+
+    :param size: number of the latest latencies to keep for percentiles
+    """
+    def __init__(self, size: int = 1024):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.latencies = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float, error: bool):
+        """
+        Add a call
+
+        :param latency: latency in seconds
+        :param error: whether the call failed
+        """
+        with self._lock:
+            self.count += 1
+            self.total += latency
+            if error:
+                self.errors += 1
+            self.latencies.append(latency)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Get a latency percentile of the latest calls
+
+        :param p: percentile between 0 and 100
+
+        :return: latency in seconds, or :code:`None` if there are no calls
+        """
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return None
+        rank = max(1, math.ceil(p / 100 * len(latencies)))
+        return latencies[rank - 1]
+
+    def toDict(self) -> dict:
+        with self._lock:
+            count, errors, total = self.count, self.errors, self.total
+        return {
+            'count': count,
+            'errors': errors,
+            'mean': total / count * 1000 if count else None,
+            'p50': _ms(self.percentile(50)),
+            'p90': _ms(self.percentile(90)),
+            'p99': _ms(self.percentile(99)),
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return seconds * 1000 if seconds is not None else None
+
+
+class StatsObserver(Observer):
+    """
+    Aggregates the statistics of each endpoint
+    """
+    def __init__(self):
+        self.stats: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, api, request, response: HttpResponseBase,
+                timer: Timer):
+        name = api._qualname
+        stats = self.stats.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self.stats.setdefault(name, EndpointStats())
+        stats.add(timer.total, timer.error is not None)
+
+
+stats_observer = StatsObserver()
+_observers: List[Observer] = []
+_enabled: Optional[bool] = None
+_header = False
+
+
+def register_observer(observer: Observer):
+    """
+    Register an observer of every api call
+
+    :param observer: observer
+    """
+    global _enabled
+    if observer not in _observers:
+        _observers.append(observer)
+    _enabled = None
+
+
+def unregister_observer(observer: Observer):
+    """
+    Stop an observer from observing api calls
+
+    :param observer: observer
+    """
+    global _enabled
+    if observer in _observers:
+        _observers.remove(observer)
+    _enabled = None
+
+
+def _configure():
+    global _enabled, _header
+    _header = getattr(settings, 'DRESTA_SERVER_TIMING', False)
+    if getattr(settings, 'DRESTA_STATS', False):
+        if stats_observer not in _observers:
+            _observers.append(stats_observer)
+    elif stats_observer in _observers:
+        _observers.remove(stats_observer)
+    _enabled = bool(_header or _observers)
+
+
+@receiver(setting_changed)
+def _reset(setting, **kwargs):
+    global _enabled
+    if setting in ('DRESTA_SERVER_TIMING', 'DRESTA_STATS'):
+        _enabled = None
+
+
+def start():
+    """
+    Start timing an api call
+
+    :return: a :class:`Timer` when instrumentation is enabled, otherwise a
+        :class:`NullTimer`
+    """
+    if _enabled is None:
+        _configure()
+    if not _enabled:
+        return NULL_TIMER
+    return Timer(_header)
+
+
+def get_stats() -> Dict[str, dict]:
+    """
+    Get the statistics of every endpoint
+
+    Latencies are in milliseconds. Requires :code:`DRESTA_STATS = True`.
+
+    :return: statistics by endpoint
+    """
+    return {
+        name: stats.toDict()
+        for name, stats in list(stats_observer.stats.items())
+    }
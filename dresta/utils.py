@@ -4,22 +4,56 @@ import datetime
 
 import json
 
-from typing import List, Any
+import array
+import base64
+import binascii
 
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import QuerySet
 
-def pagify(data: List[Any], page: int, size: int, name: str = 'data') -> dict:
+from . import arrays
+from .exceptions import ValidateError
+
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+
+def pagify(data: List[Any], page: int, size: int, name: str = 'data',
+           count: bool = True) -> dict:
     """
     Convert a list of data into pages of data
 
-    :param data: full data
+    When given a QuerySet, the count and the page are queried from the
+    database instead of loading the whole table.
+
+    :param data: full data, or a QuerySet
     :param page: page number
     :param size: page size
     :param name: name of the data
+    :param count: whether to count the total size of the data. When
+        :code:`False`, :code:`pages` and :code:`total` are :code:`None`, and
+        :code:`has_next` tells whether there is another page.
 
     :return: dictionary of the data
     """
+    is_query = isinstance(data, QuerySet)
 
-    total = len(data)
+    if not count and size > 0:
+        page = max(0, page)
+        start = page * size
+        # Fetch one more item to know whether there is a next page
+        result = list(data[start:start + size + 1])
+        has_next = len(result) > size
+        return {
+            name: result[:size],
+            'page': page,
+            'size': size,
+            'pages': None,
+            'total': None,
+            'has_next': has_next
+        }
+
+    total = data.count() if is_query else len(data)
     if size <= 0:
         size = -1
         pages = 1
@@ -34,6 +68,9 @@ def pagify(data: List[Any], page: int, size: int, name: str = 'data') -> dict:
         end = start + size
         result = data[start:end]
 
+    if is_query:
+        result = list(result)
+
     return {
         name: result,
         'page': page,
@@ -43,16 +80,229 @@ def pagify(data: List[Any], page: int, size: int, name: str = 'data') -> dict:
     }
 
 
+def _encode_cursor(value, direction: str) -> str:
+    token = json.dumps([value, direction], cls=JsonEncoder)
+    return base64.urlsafe_b64encode(token.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor: str):
+    try:
+        value, direction = json.loads(
+            base64.urlsafe_b64decode(cursor.encode('ascii'))
+        )
+        if direction not in ('n', 'p'):
+            raise ValueError(direction)
+        return value, direction
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        raise ValidateError({'cursor': ['Invalid cursor.']})
+
+
+def _clean_cursor(queryset: QuerySet, field: str, value):
+    """
+    Convert the value of a cursor into a value of the ordering field
+
+    :raises ValidateError: when the value does not fit the field
+    """
+    meta = queryset.model._meta
+    try:
+        model_field = meta.pk if field == 'pk' else meta.get_field(field)
+    except FieldDoesNotExist:
+        # Lookups that span relations are left to the database
+        return value
+    if value is None or isinstance(value, (dict, list)):
+        raise ValidateError({'cursor': ['Invalid cursor.']})
+    try:
+        return model_field.to_python(value)
+    except (DjangoValidationError, TypeError, ValueError):
+        raise ValidateError({'cursor': ['Invalid cursor.']})
+
+
+def _cursor_value(item, field: str):
+    if isinstance(item, dict):
+        return item[field]
+    return getattr(item, field)
+
+
+def cursor_pagify(queryset: QuerySet, cursor: Optional[str], size: int,
+                  ordering: str = 'pk', name: str = 'data',
+                  count: bool = False) -> dict:
+    """
+    Convert a QuerySet into pages of data using keyset pagination
+
+    Instead of an offset, pages are given by opaque cursors that filter on
+    the ordering field, so that deep pages are as fast as the first.
+
+    .. note::
+
+        The ordering field must be unique, otherwise items that share a value
+        across two pages will be skipped.
+
+    :param queryset: full data
+    :param cursor: cursor of the page, :code:`None` for the first page
+    :param size: page size
+    :param ordering: field to order by, prefix with :code:`-` for
+        descending order
+    :param name: name of the data
+    :param count: whether to count the total size of the data
+
+    :raises ValidateError: when the cursor is invalid
+
+    :return: dictionary of the data, with the :code:`next` and :code:`prev`
+        cursors
+    """
+    size = max(1, size)
+    field = ordering.lstrip('-')
+    descending = ordering.startswith('-')
+    reverse = field if descending else '-%s' % field
+
+    direction = 'n'
+    query = queryset.order_by(ordering)
+    if cursor is not None:
+        value, direction = _decode_cursor(cursor)
+        value = _clean_cursor(queryset, field, value)
+        if direction == 'n':
+            lookup = 'lt' if descending else 'gt'
+            query = query.filter(**{'%s__%s' % (field, lookup): value})
+        else:
+            lookup = 'gt' if descending else 'lt'
+            query = queryset.order_by(reverse).filter(
+                **{'%s__%s' % (field, lookup): value}
+            )
+
+    # Fetch one more item to know whether there is another page
+    result = list(query[:size + 1])
+    more = len(result) > size
+    result = result[:size]
+
+    next_cursor = prev_cursor = None
+    if direction == 'n':
+        if more:
+            next_cursor = _encode_cursor(
+                _cursor_value(result[-1], field), 'n'
+            )
+        if cursor is not None and result:
+            prev_cursor = _encode_cursor(_cursor_value(result[0], field), 'p')
+    else:
+        result.reverse()
+        if more:
+            prev_cursor = _encode_cursor(_cursor_value(result[0], field), 'p')
+        if result:
+            next_cursor = _encode_cursor(
+                _cursor_value(result[-1], field), 'n'
+            )
+
+    total = pages = None
+    if count:
+        total = queryset.count()
+        pages = math.ceil(total / size)
+
+    return {
+        name: result,
+        'page': None,
+        'size': size,
+        'pages': pages,
+        'total': total,
+        'next': next_cursor,
+        'prev': prev_cursor
+    }
+
+
+def _to_dict(obj):
+    return obj.toDict()
+
+
 class JsonEncoder(json.encoder.JSONEncoder):
     """
     A JsonEncoder that handles stringlikes
+
+    The conversion for each type is looked up once, and then cached.
+    Conversions are added with :meth:`register`, which applies to the
+    encoder and its subclasses.
+
+    .. code-block:: python
+
+        class MyEncoder(JsonEncoder):
+            pass
+
+        MyEncoder.register(decimal.Decimal, float)
     """
-    def default(self, obj):
+    converters = [
+        ((datetime.datetime, datetime.date, datetime.time), str),
+        (array.array, arrays.tolist),
+    ]
+    """Pairs of types and the function that converts them"""
+
+    _dispatch = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Each encoder has its own conversions, so a subclass that adds one
+        # doesn't change its base
+        cls.converters = list(cls.converters)
+        cls._dispatch = {}
+
+    @classmethod
+    def register(cls, types: Union[type, Tuple[type, ...]],
+                 func: Callable[[Any], Any]):
+        """
+        Add a conversion to the encoder and its subclasses
+
+        It takes precedence over the conversions added before it.
+
+        :param types: type or tuple of types to convert
+        :param func: function that converts them
+        """
+        cls.converters.insert(0, (types, func))
+        # Looked up conversions may be stale now
+        cls._dispatch = {}
+        for sub in cls.__subclasses__():
+            sub.register(types, func)
+
+    @classmethod
+    def converter(cls, t: type):
+        """
+        Get the conversion function for a type
 
-        if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
-            return str(obj)
+        :param t: type
 
-        if hasattr(obj, 'toDict'):
-            return self.default(obj.toDict())
+        :return: conversion function, or :code:`None` if the type can't be
+            converted
+        """
+        try:
+            return cls._dispatch[t]
+        except KeyError:
+            pass
 
-        return super().default(obj)
\ No newline at end of file
+        conv = None
+        for types, f in cls.converters:
+            if issubclass(t, types):
+                conv = f
+                break
+        else:
+            if hasattr(t, 'toDict'):
+                conv = _to_dict
+
+        cls._dispatch[t] = conv
+        return conv
+
+    @classmethod
+    def convert(cls, obj):
+        """
+        Convert an object into something json serializable
+
+        :param obj: object
+
+        :raises TypeError: when the object can't be converted
+
+        :return: converted object
+        """
+        conv = cls.converter(type(obj))
+        if conv is None:
+            raise TypeError(
+                'Object of type %s is not JSON serializable'
+                % obj.__class__.__name__
+            )
+        return conv(obj)
+
+    def default(self, obj):
+        return self.convert(obj)
@@ -1,30 +1,64 @@
 """
 Api Views
 """
-from typing import Type, Optional, List
+from typing import Type, Optional, Dict, List, Union
 from marshmallow import Schema, ValidationError
 import json
+import asyncio
 import inspect
 import logging
+import threading
 
+from functools import partial
+from concurrent.futures import Executor
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
 from django.http.request import HttpRequest
-from django.http.response import JsonResponse
-from django.utils.log import log_response
+from django.http.response import HttpResponse
 from django.urls import path
+from django.utils.cache import patch_vary_headers
 
-from .utils import JsonEncoder
-
-from .annotate import annotator
+from .annotate import Annotator, annotator
+from .loader import CompiledLoader
+from .cache import ResponseCache, CachedResponse, get_cache, make_key
+from .compression import Compression, get_compression
 from . import parser
+from .formats import Format, get_formats, negotiate, format_param
+from . import streaming
+from . import timing
+from . import jobs
+from . import resolver
+from . import conditional
+from .coalesce import Flights
+from .limits import (
+    ConcurrencyLimit, RateLimit, get_concurrency_limit, get_rate_limit
+)
+from .selection import ALL, Selection, fields_param
+
+from .exceptions import (
+    APIError, ValidateError, MethodNotAllowedError, AuthenticationError,
+    InternalError, USER_ERROR, log_error
+)
 
-from .exceptions import APIError, ValidateError, USER_ERROR, SERV_ERROR
+try:
+    from asgiref.sync import markcoroutinefunction
+except ImportError:
+    def markcoroutinefunction(func):
+        func._is_coroutine = asyncio.coroutines._is_coroutine
+        return func
+
+
+MAX_SCHEMAS = 256
+"""The maximum number of result schemas cached for field selections"""
 
 
 class Api:
     """
     Api Handler
 
-    :param func: api function
+    :param func: api function, which may be a coroutine function
     :param method: allowed request method types
     :param allow_get_params: whether to allow GET parameters when the method
         is not GET
@@ -32,6 +66,34 @@ class Api:
     :param args_schema: request schema
     :param auth_required: whether you need to be authenticated to access the
         api
+    :param compiled: whether to load the arguments with a precompiled loader
+        when the request schema supports it
+    :param cache: response cache for GET requests, see :mod:`dresta.cache`
+    :param cache_user: whether cached responses depend on the user
+    :param lazy: whether to build the request schema on the first request,
+        defaults to the :code:`DRESTA_LAZY_SCHEMAS` setting
+    :param annotator: annotator that builds the request schema
+    :param formats: response formats, the first is the default, see
+        :mod:`dresta.formats`
+    :param compress: response compression, see :mod:`dresta.compression`
+    :param background: whether to run the api function as a background job,
+        see :mod:`dresta.jobs`
+    :param lookup: lookup fields of model parameters by model, see
+        :mod:`dresta.resolver`
+    :param select_related: related fields to select when loading model
+        parameters, for every model or by model
+    :param only: fields to load of model parameters, for every model or by
+        model
+    :param etag: :code:`True` to add the hash of the response as its ETag,
+        or a function that returns the ETag of a call, see
+        :mod:`dresta.conditional`
+    :param last_modified: a function that returns when the response of a
+        call was last modified
+    :param coalesce: whether concurrent identical calls wait for the
+        response of the first one, see :mod:`dresta.coalesce`
+    :param concurrency: maximum number of requests that run at once, see
+        :mod:`dresta.limits`
+    :param rate: requests per client over time, see :mod:`dresta.limits`
     """
     def __init__(self, **kwargs):
         self.func: callable = kwargs.pop('func')
@@ -42,15 +104,118 @@ class Api:
         self.schema: Optional[Type[Schema]] = kwargs.pop('schema', None)
         self.auth_required: bool = kwargs.pop('auth_required', False)
         self._name: Optional[str] = kwargs.pop('name', None)
+        self.compiled: bool = kwargs.pop('compiled', True)
+        self.annotator: Annotator = kwargs.pop('annotator', None) \
+            or annotator
+        self.cache_user: bool = kwargs.pop('cache_user', False)
+        self.formats: List[Format] = get_formats(kwargs.pop('formats', None))
+        self.compression: Optional[Compression] = get_compression(
+            kwargs.pop('compress', None)
+        )
+        self.background: Union[bool, str, Executor] = kwargs.pop(
+            'background', False
+        )
+        self.lookup: Optional[dict] = kwargs.pop('lookup', None)
+        self.select_related: resolver.Hint = kwargs.pop('select_related', None)
+        self.only: resolver.Hint = kwargs.pop('only', None)
+        self.flights: Optional[Flights] = \
+            Flights() if kwargs.pop('coalesce', False) else None
+
+        etag = kwargs.pop('etag', None)
+        last_modified = kwargs.pop('last_modified', None)
+        if etag is None:
+            etag = settings.configured \
+                and getattr(settings, 'DRESTA_ETAGS', False)
+        self.auto_etag: bool = etag is True
+        self.conditions: Optional[conditional.Conditions] = None
+        if callable(etag) or last_modified is not None:
+            self.conditions = conditional.Conditions(
+                etag if callable(etag) else None,
+                last_modified
+            )
+
+        self._qualname = '%s.%s' % (
+            self.func.__module__, self.func.__qualname__
+        )
+        self.cache: Optional[ResponseCache] = get_cache(
+            kwargs.pop('cache', None), prefix='dresta:%s' % self._qualname
+        )
+        self.concurrency: Optional[ConcurrencyLimit] = get_concurrency_limit(
+            kwargs.pop('concurrency', None)
+        )
+        self.rate_limit: Optional[RateLimit] = get_rate_limit(
+            kwargs.pop('rate', None), prefix='dresta:rate:%s' % self._qualname
+        )
+
+        self.is_async: bool = inspect.iscoroutinefunction(self.func)
 
         self.logger = logging.getLogger(__name__)
 
-        if self.args_schema is None:
-            self.args_schema = annotator.annotate(
-                self.func,
-                ignore=["request"]
+        if self.is_async:
+            # Let django know that this view is async
+            markcoroutinefunction(self)
+
+        # Parameters that are given the selected fields of the result
+        self._selection_params: List[str] = [
+            name for name, param in self.sig.parameters.items()
+            if param.annotation is Selection
+        ]
+        self._sparse = False
+        self._schemas: Dict[Optional[frozenset], Schema] = {}
+
+        self.loader: Optional[CompiledLoader] = None
+        self._models = False
+        self._built = False
+        self._build_lock = threading.Lock()
+
+        lazy = kwargs.pop('lazy', None)
+        if lazy is None:
+            lazy = settings.configured \
+                and getattr(settings, 'DRESTA_LAZY_SCHEMAS', False)
+        if not lazy:
+            self.build()
+
+    def build(self):
+        """
+        Build the request schema and loader of the api
+
+        This is done once, and is safe to call from multiple threads. Lazy
+        apis are built on their first request.
+        """
+        if self._built:
+            return
+        with self._build_lock:
+            if self._built:
+                return
+
+            if self.args_schema is None:
+                self.args_schema = self.annotator.annotate(
+                    self.func,
+                    ignore=["request"] + self._selection_params
+                )
+
+            if self.compiled and CompiledLoader.supports(self.args_schema):
+                self.loader = CompiledLoader.fromSchema(self.args_schema)
+
+            self._models = resolver.has_model_fields(self.args_schema)
+            self._sparse = (
+                self.schema is not None or bool(self._selection_params)
+            ) and (
+                fields_param() not in self.sig.parameters
+                or fields_param() in self._selection_params
             )
 
+            self._built = True
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        """
+        The executor that background jobs of the api are run on
+        """
+        if not self.background:
+            return None
+        return jobs.get_executor(self.background)
+
     @property
     def name(self):
         """
@@ -68,6 +233,99 @@ class Api:
         """
         return path("%s/" % self.name, self)
 
+    def _cache_key(self, request: HttpRequest,
+                   bound: inspect.BoundArguments,
+                   fmt: Optional[Format] = None,
+                   selection: Optional[Selection] = None) -> Optional[str]:
+        """
+        Get the cache key of a request
+
+        :param request: request
+        :param bound: bound arguments
+        :param fmt: response format
+        :param selection: selected fields of the result
+
+        :return: cache key, or :code:`None` if the request can't be cached
+        """
+        if self.cache is None:
+            return None
+        return self._call_key(request, bound, fmt, selection)
+
+    def _call_key(self, request: HttpRequest,
+                  bound: inspect.BoundArguments,
+                  fmt: Optional[Format] = None,
+                  selection: Optional[Selection] = None) -> Optional[str]:
+        """
+        Get the key of the response of a request, which identifies it in
+        the cache and among the calls in flight
+
+        :param request: request
+        :param bound: bound arguments
+        :param fmt: response format
+        :param selection: selected fields of the result
+
+        :return: key, or :code:`None` if the request isn't idempotent
+        """
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        args = {
+            k: v for k, v in bound.arguments.items()
+            if k != 'request' and k not in self._selection_params
+        }
+        if selection is not None:
+            args[fields_param()] = sorted(selection.fields)
+        user = request.user.pk if self.cache_user else None
+        return make_key(self._format_name(fmt), args, user)
+
+    def _format_name(self, fmt: Optional[Format]) -> str:
+        """
+        The name of the responses of a format in the cache
+        """
+        if fmt is None or fmt is self.formats[0]:
+            return self._qualname
+        return '%s:%s' % (self._qualname, fmt.name)
+
+    def _cache_store(self, key: Optional[str],
+                     response: HttpResponse) -> Optional[CachedResponse]:
+        if key is None or response.streaming \
+                or response.status_code != 200:
+            return None
+        return CachedResponse.fromResponse(response)
+
+    def invalidate(self, *args, user=None, **kwargs):
+        """
+        Remove the cached response of a call to the api function
+
+        Responses of a selection of fields are only removed by
+        :meth:`cache_clear`.
+
+        :param args: arguments of the api function, without the request
+        :param user: user, when the cache depends on the user
+        :param kwargs: arguments of the api function, without the request
+        """
+        if self.cache is None:
+            return
+        if 'request' in self.sig.parameters:
+            args = (None,) + args
+        for name in self._selection_params:
+            kwargs.setdefault(name, ALL)
+        bound = self.sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        args = {
+            k: v for k, v in bound.arguments.items()
+            if k != 'request' and k not in self._selection_params
+        }
+        pk = getattr(user, 'pk', None) if self.cache_user else None
+        for fmt in self.formats:
+            self.cache.delete(make_key(self._format_name(fmt), args, pk))
+
+    def cache_clear(self):
+        """
+        Remove all the cached responses of the api
+        """
+        if self.cache is not None:
+            self.cache.clear()
+
     def _merge(self, source, destination):
         """
         Recursive merge from source to destination
@@ -90,91 +348,644 @@ class Api:
 
     def _api_error(self, request: HttpRequest, error: APIError):
         response = error.response()
-        log_response(
-            '%s (%s): %s', error.details, error.code, request.path,
-            response=response,
-            request=request
-        )
+        log_error(request, response, error)
         return response
 
-    def __call__(self, request: HttpRequest):
+    def _check_method(self, method: str):
         """
-        The actual view of the api
+        Assert the correct method type
+
+        :param method: request method
+
+        :raises APIError: when the method is not allowed
+        """
+        if self.methods is not None and method not in self.methods:
+            raise MethodNotAllowedError(self.methods)
+
+    def _parse(self, request: HttpRequest,
+               timer: timing.Timer = timing.NULL_TIMER) -> dict:
+        """
+        Parse the raw parameters of a request
 
         :param request: request
+        :param timer: timer of the call
+
+        :raises APIError: when the request is invalid
+
+        :return: raw parameters
         """
-        try:
-            # Assert the correct method type
-            if self.methods is not None and request.method not in self.methods:
-                apiError = APIError(
-                    USER_ERROR | 2,
-                    detail="Method Not Allowed",
-                    methods=self.methods
+        self._check_method(request.method)
+
+        # Get the GET params
+        if (request.method != 'GET' and self.allow_get_params) \
+                or request.method == 'GET':
+            params = parser.parseQueryDict(request.GET)
+        else:
+            params = {}
+        params.pop(format_param(), None)
+        timer.mark('query')
+
+        # Get the POST params
+        if request.body:
+            try:
+                post = json.loads(
+                    request.body.decode(request.encoding or 'utf-8')
                 )
-                return self._api_error(request, apiError)
+                params = self._merge(post, params)
+            except (json.JSONDecodeError, UnicodeDecodeError) as error:
+                raise APIError(
+                    USER_ERROR | 3,
+                    detail="Invalid Json",
+                    error=str(error)
+                )
+            timer.mark('body')
+
+        return params
+
+    def _select(self, params: dict) -> Optional[Selection]:
+        """
+        Take the selected fields of the result from the raw parameters
+
+        :param params: raw parameters
+
+        :raises ValidateError: when the selection is invalid
+
+        :return: selection, or :code:`None` if every field is selected
+        """
+        if not self._built:
+            self.build()
+        if not self._sparse:
+            return None
+        name = fields_param()
+        value = params.pop(name, None)
+        if value is None:
+            return None
+        try:
+            selection = Selection.parse(value)
+            if not selection.fields:
+                return None
+            self._schema(selection)
+        except ValueError as error:
+            raise ValidateError(
+                {name: [str(error)]},
+                detail="Invalid Parameters"
+            )
+        return selection
+
+    def _schema(self, selection: Optional[Selection] = None):
+        """
+        Get the result schema of a selection
+
+        The schema of each selection is created once.
+
+        :param selection: selected fields
+
+        :raises ValueError: when a selected field does not exist
+
+        :return: result schema, or :code:`None` if there is none
+        """
+        if self.schema is None:
+            return None
+        only = selection.fields if selection is not None else None
+        schema = self._schemas.get(only)
+        if schema is None:
+            schema = self.schema(only=only)
+            if len(self._schemas) < MAX_SCHEMAS:
+                self._schemas[only] = schema
+        return schema
+
+    def _load(self, request: HttpRequest, params: dict,
+              selection: Optional[Selection] = None
+              ) -> inspect.BoundArguments:
+        """
+        Load the raw parameters into the arguments of the api function
+
+        :param request: request
+        :param params: raw parameters
+        :param selection: selected fields of the result
+
+        :raises ValidateError: when the parameters are invalid
 
-            # Get the GET params
-            if (request.method != 'GET' and self.allow_get_params) \
-                    or request.method == 'GET':
-                params = parser.parseQueryDict(request.GET)
+        :return: bound arguments
+        """
+        if not self._built:
+            self.build()
+        try:
+            if self.loader is not None:
+                args = self.loader.load(params)
             else:
-                params = {}
-
-            # Get the POST params
-            if request.body:
-                try:
-                    post = json.loads(request.body, encoding=request.encoding)
-                    params = self._merge(post, params)
-                except json.JSONDecodeError as error:
-                    apiError = APIError(
-                        USER_ERROR | 3,
-                        detail="Invalid Json",
-                        error=str(error)
-                    )
-                    return self._api_error(request, apiError)
+                args = self.args_schema().load(params)
+            if 'request' in self.sig.parameters:
+                args['request'] = request
+            for name in self._selection_params:
+                args[name] = selection or ALL
+            return self.sig.bind(**args)
+        except ValidationError as error:
+            raise ValidateError.fromMarshmallowError(
+                error,
+                detail="Invalid Parameters"
+            )
 
-            # Parse the arguments
-            args_schema = self.args_schema()
-            try:
-                args = args_schema.load(params)
-                if 'request' in self.sig.parameters:
-                    args['request'] = request
-                bound = self.sig.bind(**args)
-            except ValidationError as error:
-                apiError = ValidateError.fromMarshmallowError(
-                    error,
-                    detail="Invalid Parameters"
+    def _negotiate(self, request: HttpRequest) -> Format:
+        """
+        Pick the format of the response
+
+        :param request: request
+
+        :raises APIError: when the requested format is not available
+
+        :return: response format
+        """
+        if len(self.formats) == 1 and format_param() not in request.GET:
+            return self.formats[0]
+        return negotiate(request, self.formats)
+
+    def _vary(self, response: HttpResponse) -> HttpResponse:
+        if len(self.formats) > 1:
+            patch_vary_headers(response, ('Accept',))
+        return response
+
+    def _finish(self, request: HttpRequest, response: HttpResponse,
+                timer: timing.Timer = timing.NULL_TIMER,
+                validators: Optional[tuple] = None) -> HttpResponse:
+        """
+        Answer conditional requests, and compress a response if the api
+        compresses its responses
+
+        Error responses are returned as they are, without validators or
+        compression.
+
+        :param request: request
+        :param response: response
+        :param timer: timer of the call
+        :param validators: ETag and last modified time of the response
+
+        :return: response
+        """
+        if getattr(response, 'api_error', False):
+            return response
+        if validators is not None:
+            conditional.set_validators(response, *validators)
+        if self.auto_etag:
+            response = conditional.respond(request, response)
+        if self.compression is not None:
+            response = self.compression.apply(request, response)
+            timer.mark('compress')
+        return response
+
+    def _resolve(self, bound: inspect.BoundArguments):
+        """
+        Load the model parameters of the arguments
+
+        :param bound: bound arguments
+
+        :raises ValidateError: when a model instance does not exist
+        """
+        args = {
+            k: v for k, v in bound.arguments.items()
+            if k != 'request'
+        }
+        resolver.resolve(
+            args,
+            lookup=self.lookup,
+            select_related=self.select_related,
+            only=self.only
+        )
+        bound.arguments.update(args)
+
+    def _authenticate(self, request: HttpRequest):
+        """
+        Assert that the request is authenticated if it is required
+
+        :param request: request
+
+        :raises APIError: when the request is not authenticated
+        """
+        if self.auth_required and not request.user.is_authenticated:
+            raise AuthenticationError()
+
+    def _dump(self, result, selection: Optional[Selection] = None):
+        """
+        Dump the result of the api function with the result schema
+
+        :param result: result
+        :param selection: selected fields of the result
+
+        :return: dumped result
+        """
+        if self.schema is not None:
+            result = self._schema(selection).dump(result)
+
+        if result is None:
+            result = {}
+
+        return result
+
+    def _render(self, result,
+                timer: timing.Timer = timing.NULL_TIMER,
+                fmt: Optional[Format] = None,
+                selection: Optional[Selection] = None) -> HttpResponse:
+        """
+        Dump the result of the api function into a response
+
+        Generators and iterators are streamed, dumping each item with the
+        schema. Streams are always json.
+
+        :param result: result
+        :param timer: timer of the call
+        :param fmt: response format, defaults to the first format
+        :param selection: selected fields of the result
+
+        :return: response
+        """
+        if streaming.isstream(result):
+            return streaming.response(result, self._schema(selection))
+
+        result = self._dump(result, selection)
+        timer.mark('dump')
+
+        if not isinstance(result, dict):
+            raise TypeError(
+                "Api results must be a dict, not %s" % type(result).__name__
+            )
+
+        if fmt is None:
+            fmt = self.formats[0]
+        content = fmt.encode(result)
+        timer.mark('encode')
+        return self._vary(
+            HttpResponse(content, content_type=fmt.content_type)
+        )
+
+    def execute(self, request: HttpRequest, params: dict,
+                method: str = 'GET'):
+        """
+        Run the api with parameters that have already been parsed
+
+        This skips url resolution and the parsing of the request, and is used
+        to run the calls of a batch request. Streamed results are collected.
+        An api that runs in the background starts a job, and returns its
+        status instead.
+
+        :param request: request to run the api with
+        :param params: raw parameters
+        :param method: request method of the call
+
+        :raises APIError: when the call fails
+
+        :return: dumped result
+        """
+        self._check_method(method)
+        self._admit(request)
+        try:
+            selection = self._select(params)
+            bound = self._load(request, params, selection)
+            self._authenticate(request)
+            if self._models:
+                self._resolve(bound)
+            if self.background:
+                return jobs.job_data(
+                    jobs.submit(self, request, bound, selection)
                 )
-                return self._api_error(request, apiError)
+            result = self.func(*bound.args, **bound.kwargs)
+            if streaming.isstream(result):
+                return streaming.collect(result, self._schema(selection))
+            return self._dump(result, selection)
+        finally:
+            self._release()
+
+    async def aexecute(self, request: HttpRequest, params: dict,
+                       method: str = 'GET'):
+        """
+        Run the async api with parameters that have already been parsed
+
+        :param request: request to run the api with
+        :param params: raw parameters
+        :param method: request method of the call
 
+        :raises APIError: when the call fails
+
+        :return: dumped result
+        """
+        self._check_method(method)
+        await self._aadmit(request)
+        try:
+            selection = self._select(params)
+            bound = self._load(request, params, selection)
             if self.auth_required:
-                # Assert authentication
-                if not request.user.is_authenticated:
-                    apiError = APIError(
-                        USER_ERROR | 4,
-                        "Authentication required."
+                await sync_to_async(self._authenticate)(request)
+            if self._models:
+                await sync_to_async(self._resolve)(bound)
+            if self.background:
+                # The owner of the job is loaded from the database
+                job = await sync_to_async(jobs.submit)(
+                    self, request, bound, selection
+                )
+                return jobs.job_data(job)
+            result = await self.func(*bound.args, **bound.kwargs)
+            if streaming.isstream(result):
+                return await streaming.acollect(
+                    result, self._schema(selection)
+                )
+            return self._dump(result, selection)
+        finally:
+            self._release()
+
+    def _admit(self, request: HttpRequest):
+        """
+        Admit a request within the limits of the api
+
+        A request that is admitted holds a slot of the concurrency limit
+        until :meth:`_release`.
+
+        :param request: request
+
+        :raises APIError: when the request is over a limit
+        """
+        if self.rate_limit is not None:
+            self.rate_limit.check(request)
+        if self.concurrency is not None:
+            self.concurrency.acquire()
+
+    async def _aadmit(self, request: HttpRequest):
+        """
+        Admit a request within the limits of the api, without blocking the
+        event loop
+
+        :param request: request
+
+        :raises APIError: when the request is over a limit
+        """
+        if self.rate_limit is not None:
+            if self.rate_limit.blocking:
+                await sync_to_async(self.rate_limit.check)(request)
+            else:
+                self.rate_limit.check(request)
+        if self.concurrency is not None:
+            await self.concurrency.aacquire()
+
+    def _release(self):
+        if self.concurrency is not None:
+            self.concurrency.release()
+
+    def _internal_error(self, request: HttpRequest) -> HttpResponse:
+        self.logger.exception("Internal Error")
+        return self._api_error(request, InternalError())
+
+    def __call__(self, request: HttpRequest):
+        """
+        The actual view of the api
+
+        When the api function is a coroutine function, this returns a
+        coroutine that resolves to the response.
+
+        :param request: request
+        """
+        if self.is_async:
+            return self._acall(request)
+        timer = timing.start()
+        if self.concurrency is None and self.rate_limit is None:
+            response = self._handle(request, timer)
+        else:
+            response = self._handle_limited(request, timer)
+        timer.finish(self, request, response)
+        return response
+
+    def _handle_limited(self, request: HttpRequest, timer: timing.Timer):
+        """
+        Handle a request within the limits of the api, rejecting it before
+        it is parsed when it is over a limit
+        """
+        try:
+            self._admit(request)
+        except APIError as error:
+            timer.fail(error)
+            return self._api_error(request, error)
+        try:
+            return self._handle(request, timer)
+        finally:
+            self._release()
+
+    def _handle(self, request: HttpRequest, timer: timing.Timer):
+        try:
+            try:
+                fmt = self._negotiate(request)
+                params = self._parse(request, timer)
+                selection = self._select(params)
+                bound = self._load(request, params, selection)
+                timer.mark('load')
+                self._authenticate(request)
+                if self._models:
+                    self._resolve(bound)
+                    timer.mark('resolve')
+
+                if self.background:
+                    return jobs.job_response(
+                        request,
+                        jobs.submit(self, request, bound, selection),
+                        202
                     )
-                    raise self._api_error(request, apiError)
 
-            # Run the api
+                validators = None
+                if self.conditions is not None:
+                    validators = self.conditions.evaluate(bound)
+                    response = conditional.check(request, *validators)
+                    if response is not None:
+                        return self._vary(response)
+
+                key = self._cache_key(request, bound, fmt, selection)
+                if key is not None:
+                    cached = self.cache.get(key)
+                    if cached is not None:
+                        return self._finish(
+                            request, self._vary(cached.response()), timer,
+                            validators
+                        )
+
+                flight = key
+                if flight is None and self.flights is not None:
+                    flight = self._call_key(request, bound, fmt, selection)
+            except APIError as error:
+                timer.fail(error)
+                return self._api_error(request, error)
+
+            run = partial(
+                self._run, request, bound, fmt, selection, key, timer
+            )
+            if self.flights is not None and flight is not None:
+                response = self._vary(self.flights.run(flight, run))
+            else:
+                response = run()
+            return self._finish(request, response, timer, validators)
+        except Exception as error:
+            timer.fail(error)
+            return self._internal_error(request)
+
+    def _run(self, request: HttpRequest, bound: inspect.BoundArguments,
+             fmt: Format, selection: Optional[Selection],
+             key: Optional[str], timer: timing.Timer) -> HttpResponse:
+        """
+        Run the api function, and render and cache its response
+
+        :param request: request
+        :param bound: bound arguments
+        :param fmt: response format
+        :param selection: selected fields of the result
+        :param key: cache key
+        :param timer: timer of the call
+
+        :return: response
+        """
+        try:
             try:
+                timer.skip()
                 result = self.func(*bound.args, **bound.kwargs)
+                timer.mark('view')
             except APIError as error:
+                timer.fail(error)
                 return self._api_error(request, error)
 
-            # Dump the results
-            if self.schema is not None:
-                schema = self.schema()
-                result = schema.dump(result)
+            response = self._render(result, timer, fmt, selection)
+            cached = self._cache_store(key, response)
+            if cached is not None:
+                self.cache.set(key, cached)
+            return response
+        except Exception as error:
+            # Calls that wait for this one are given the same response
+            timer.fail(error)
+            return self._internal_error(request)
+
+    async def _acall(self, request: HttpRequest):
+        """
+        The async view of the api
+
+        :param request: request
+        """
+        timer = timing.start()
+        if self.concurrency is None and self.rate_limit is None:
+            response = await self._ahandle(request, timer)
+        else:
+            response = await self._ahandle_limited(request, timer)
+        timer.finish(self, request, response)
+        return response
+
+    async def _ahandle_limited(self, request: HttpRequest,
+                               timer: timing.Timer):
+        try:
+            await self._aadmit(request)
+        except APIError as error:
+            timer.fail(error)
+            return self._api_error(request, error)
+        try:
+            return await self._ahandle(request, timer)
+        finally:
+            self._release()
+
+    async def _ahandle(self, request: HttpRequest, timer: timing.Timer):
+        try:
+            try:
+                fmt = self._negotiate(request)
+                params = self._parse(request, timer)
+                selection = self._select(params)
+                bound = self._load(request, params, selection)
+                timer.mark('load')
+                if self.auth_required:
+                    # The user is loaded lazily from the database
+                    await sync_to_async(self._authenticate)(request)
+                if self._models:
+                    await sync_to_async(self._resolve)(bound)
+                    timer.mark('resolve')
+
+                if self.background:
+                    # The owner of the job is loaded from the database
+                    job = await sync_to_async(jobs.submit)(
+                        self, request, bound, selection
+                    )
+                    return jobs.job_response(request, job, 202)
+
+                validators = None
+                if self.conditions is not None:
+                    if self.conditions.is_async:
+                        validators = await self.conditions.aevaluate(bound)
+                    else:
+                        validators = await sync_to_async(
+                            self.conditions.evaluate
+                        )(bound)
+                    response = conditional.check(request, *validators)
+                    if response is not None:
+                        return self._vary(response)
+
+                if self.cache_user:
+                    key = await sync_to_async(self._cache_key)(
+                        request, bound, fmt, selection
+                    )
+                else:
+                    key = self._cache_key(request, bound, fmt, selection)
+                if key is not None:
+                    cached = await self.cache.aget(key)
+                    if cached is not None:
+                        return self._finish(
+                            request, self._vary(cached.response()), timer,
+                            validators
+                        )
 
-            if result is None:
-                result = {}
+                flight = key
+                if flight is None and self.flights is not None:
+                    if self.cache_user:
+                        flight = await sync_to_async(self._call_key)(
+                            request, bound, fmt, selection
+                        )
+                    else:
+                        flight = self._call_key(
+                            request, bound, fmt, selection
+                        )
+            except APIError as error:
+                timer.fail(error)
+                return self._api_error(request, error)
 
-            return JsonResponse(result, encoder=JsonEncoder)
-        except Exception:
-            self.logger.exception("Internal Error")
-            apiError = APIError(
-                code=SERV_ERROR,
-                detail="Internal Error"
+            run = partial(
+                self._arun, request, bound, fmt, selection, key, timer
             )
-            return self._api_error(request, apiError)
+            if self.flights is not None and flight is not None:
+                response = self._vary(await self.flights.arun(flight, run))
+            else:
+                response = await run()
+            return self._finish(request, response, timer, validators)
+        except Exception as error:
+            timer.fail(error)
+            return self._internal_error(request)
+
+    async def _arun(self, request: HttpRequest,
+                    bound: inspect.BoundArguments, fmt: Format,
+                    selection: Optional[Selection], key: Optional[str],
+                    timer: timing.Timer) -> HttpResponse:
+        """
+        Run the async api function, and render and cache its response
+
+        :param request: request
+        :param bound: bound arguments
+        :param fmt: response format
+        :param selection: selected fields of the result
+        :param key: cache key
+        :param timer: timer of the call
+
+        :return: response
+        """
+        try:
+            try:
+                timer.skip()
+                result = await self.func(*bound.args, **bound.kwargs)
+                timer.mark('view')
+            except APIError as error:
+                timer.fail(error)
+                return self._api_error(request, error)
+
+            response = self._render(result, timer, fmt, selection)
+            cached = self._cache_store(key, response)
+            if cached is not None:
+                await self.cache.aset(key, cached)
+            return response
+        except Exception as error:
+            # Calls that wait for this one are given the same response
+            timer.fail(error)
+            return self._internal_error(request)
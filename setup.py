@@ -18,6 +18,10 @@ INSTALL_REQUIRES = [
     'marshmallow>=3.9.1'
 ]
 
+EXTRAS_REQUIRE = {
+    'orjson': ['orjson>=3.0']
+}
+
 setup(
     name="django-dresta",
     version="0.1.4",
@@ -27,6 +31,7 @@ setup(
     long_description_content_type="text/markdown",
 
     install_requires=INSTALL_REQUIRES,
+    extras_require=EXTRAS_REQUIRE,
 
     author='Benjamin Jacobs',
     author_email='benjammin1100@gmail.com',
@@ -0,0 +1,16 @@
+"""
+Tests of dresta
+
+Run from the root of the repository with
+
+.. code-block:: sh
+
+    python -m unittest discover -s tests -t .
+"""
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+import django  # noqa: E402
+
+django.setup()
@@ -0,0 +1,38 @@
+"""
+Minimal django settings to run the tests
+"""
+SECRET_KEY = 'tests'
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['*']
+
+INSTALLED_APPS = [
+    'django.contrib.contenttypes',
+    'django.contrib.auth',
+    'django.contrib.sessions',
+]
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+ROOT_URLCONF = 'tests.urls'
+
+USE_TZ = True
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'loggers': {
+        'django.request': {
+            'level': 'CRITICAL',
+        },
+        'dresta': {
+            'level': 'CRITICAL',
+        },
+    },
+}
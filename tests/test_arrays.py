@@ -0,0 +1,42 @@
+import array
+
+from django.test import RequestFactory, SimpleTestCase
+
+from dresta.arrays import Array
+from dresta.views import Api
+
+
+def total(request, xs: array.array):
+    return {'total': sum(xs), 'typecode': xs.typecode}
+
+
+Pairs = Array.of('i', shape=[None, 2])
+
+
+def pairs(request, pts: Pairs):
+    return {'pts': pts}
+
+
+class ArrayTest(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_of_list_shape(self):
+        self.assertIs(Array.of('d', shape=[2, 2]), Array.of('d', (2, 2)))
+        self.assertEqual(Array.of('d', shape=[2, 2]).shape, (2, 2))
+
+    def test_query_values(self):
+        api = Api(func=total)
+        for query in ('xs=1&xs=2', 'xs=1,2', 'xs[0]=1&xs[1]=2'):
+            response = api(self.factory.get('/?' + query))
+            self.assertEqual(
+                response.content, b'{"total": 3.0, "typecode": "d"}', query
+            )
+
+    def test_indexed_shape(self):
+        api = Api(func=pairs)
+        response = api(self.factory.get(
+            '/?pts[0][0]=1&pts[0][1]=2&pts[1][0]=3&pts[1][1]=4'
+        ))
+        self.assertEqual(response.content, b'{"pts": [[1, 2], [3, 4]]}')
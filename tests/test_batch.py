@@ -0,0 +1,60 @@
+import json
+import time
+
+from django.test import RequestFactory, SimpleTestCase
+
+from dresta import jobs
+from dresta.batch import BatchView
+from dresta.views import Api
+
+
+class BatchTest(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def batch(self, apis, calls):
+        view = BatchView({'app': apis})
+        response = view(self.factory.post(
+            '/', json.dumps(calls), content_type='application/json'
+        ))
+        return json.loads(response.content)['results']
+
+    def test_background(self):
+        def report(request, n: int):
+            return {'n': n}
+
+        async def areport(request, n: int):
+            return {'n': n}
+
+        apis = {
+            'report': Api(func=report, background='thread'),
+            'areport': Api(func=areport, background='thread'),
+        }
+        results = self.batch(apis, [
+            {'app': 'app', 'name': 'report', 'params': {'n': 1}},
+            {'app': 'app', 'name': 'areport', 'params': {'n': 2}},
+        ])
+        for n, result in enumerate(results, 1):
+            status = result['result']
+            self.assertIn(status['status'], (jobs.PENDING, jobs.DONE))
+            for _ in range(100):
+                job = jobs.store.get(status['id'])
+                if job.status == jobs.DONE:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(job.result, {'n': n})
+
+    def test_cache(self):
+        calls = []
+
+        def count(request):
+            calls.append(1)
+            return {'calls': len(calls)}
+
+        apis = {'count': Api(func=count, cache=60)}
+        call = {'app': 'app', 'name': 'count'}
+        results = self.batch(apis, [call]) + self.batch(apis, [call])
+        self.assertEqual(
+            [r['result'] for r in results], [{'calls': 1}, {'calls': 2}]
+        )
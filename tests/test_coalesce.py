@@ -0,0 +1,64 @@
+import asyncio
+
+from django.test import RequestFactory, SimpleTestCase
+
+from dresta.views import Api
+
+
+class CoalesceTest(SimpleTestCase):
+
+    def test_cancelled_follower(self):
+        calls = []
+
+        async def slow(request, n: int):
+            calls.append(n)
+            await asyncio.sleep(0.2)
+            return {'n': n}
+
+        api = Api(func=slow, coalesce=True)
+        factory = RequestFactory()
+
+        async def main():
+            leader = asyncio.ensure_future(api(factory.get('/?n=1')))
+            await asyncio.sleep(0.05)
+            cancelled = asyncio.ensure_future(api(factory.get('/?n=1')))
+            follower = asyncio.ensure_future(api(factory.get('/?n=1')))
+            await asyncio.sleep(0.05)
+            cancelled.cancel()
+            return await asyncio.gather(
+                leader, cancelled, follower, return_exceptions=True
+            )
+
+        leader, cancelled, follower = asyncio.run(main())
+        self.assertIsInstance(cancelled, asyncio.CancelledError)
+        self.assertEqual(leader.content, b'{"n": 1}')
+        self.assertEqual(follower.content, b'{"n": 1}')
+        self.assertEqual(calls, [1])
+
+    def test_cancelled_leader(self):
+        calls = []
+
+        async def slow(request, n: int):
+            calls.append(n)
+            await asyncio.sleep(0.2)
+            return {'n': n}
+
+        api = Api(func=slow, coalesce=True)
+        factory = RequestFactory()
+
+        async def main():
+            leader = asyncio.ensure_future(api(factory.get('/?n=1')))
+            await asyncio.sleep(0.05)
+            followers = [
+                asyncio.ensure_future(api(factory.get('/?n=1')))
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0.05)
+            leader.cancel()
+            return await asyncio.gather(*followers)
+
+        responses = asyncio.run(main())
+        self.assertEqual(
+            [r.content for r in responses], [b'{"n": 1}'] * 3
+        )
+        self.assertEqual(len(calls), 2)
@@ -0,0 +1,32 @@
+import decimal
+import json
+
+from django.test import SimpleTestCase
+
+from dresta.utils import JsonEncoder
+
+
+class EncoderTest(SimpleTestCase):
+
+    def test_register(self):
+        class Base(JsonEncoder):
+            pass
+
+        class Sub(Base):
+            pass
+
+        value = decimal.Decimal('1.5')
+        with self.assertRaises(TypeError):
+            json.dumps(value, cls=Sub)
+
+        Sub.register(decimal.Decimal, float)
+        self.assertEqual(json.dumps(value, cls=Sub), '1.5')
+        with self.assertRaises(TypeError):
+            json.dumps(value, cls=Base)
+        self.assertNotIn(decimal.Decimal, dict(JsonEncoder.converters))
+
+        # Conversions of a base reach its subclasses, and replace the cached
+        # conversions
+        Base.register(decimal.Decimal, str)
+        self.assertEqual(json.dumps(value, cls=Base), '"1.5"')
+        self.assertEqual(json.dumps(value, cls=Sub), '"1.5"')
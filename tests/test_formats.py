@@ -0,0 +1,28 @@
+from django.test import RequestFactory, SimpleTestCase
+
+from dresta.views import Api
+
+
+def add(request, a: int, b: int = 1):
+    return {'sum': a + b}
+
+
+class FormatParamTest(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_single_format(self):
+        api = Api(func=add)
+        response = api(self.factory.get('/?a=1&_format=json'))
+        self.assertEqual(response.content, b'{"sum": 2}')
+
+    def test_unsupported_format(self):
+        api = Api(func=add)
+        response = api(self.factory.get('/?a=1&_format=msgpack'))
+        self.assertIn(b'"Not Acceptable"', response.content)
+
+    def test_many_formats(self):
+        api = Api(func=add, formats=['json', 'columnar'])
+        response = api(self.factory.get('/?a=1&_format=columnar'))
+        self.assertEqual(response.content, b'{"sum": 2}')
@@ -0,0 +1,82 @@
+import json
+import types
+
+from concurrent.futures import Future
+
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.test import RequestFactory, SimpleTestCase
+
+from dresta import jobs, include_api_patterns
+from dresta.views import Api
+
+
+class User:
+    is_authenticated = True
+
+    def __init__(self, pk):
+        self.pk = pk
+
+
+def report(request):
+    return {}
+
+
+class JobTest(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.api = Api(func=report, background='thread')
+
+    def request(self, session=None, user=None):
+        request = self.factory.get('/')
+        request.session = session or SessionStore()
+        if user is not None:
+            request.user = user
+        return request
+
+    def status(self, request, job):
+        response = jobs.JobView()(request, job.id)
+        return json.loads(response.content)
+
+    def add(self, owner):
+        job = jobs.Job(self.api, owner)
+        jobs.store.add(job)
+        return job
+
+    def test_session_owner(self):
+        request = self.request()
+        owner = jobs.job_owner(request, create=True)
+        self.assertEqual(owner, 'session:%s' % request.session.session_key)
+        self.assertTrue(request.session.modified)
+
+        job = self.add(owner)
+        self.assertEqual(self.status(request, job)['id'], job.id)
+        self.assertNotIn('id', self.status(self.request(), job))
+
+    def test_user_owner(self):
+        job = self.add(jobs.job_owner(self.request(user=User(1))))
+        self.assertEqual(job.owner, 'user:1')
+        self.assertEqual(
+            self.status(self.request(user=User(1)), job)['id'], job.id
+        )
+        self.assertNotIn('id', self.status(self.request(user=User(2)), job))
+
+    def test_no_owner(self):
+        request = self.factory.get('/')
+        self.assertIsNone(jobs.job_owner(request, create=True))
+        job = self.add(None)
+        self.assertEqual(self.status(request, job)['id'], job.id)
+
+    def test_running(self):
+        job = self.add(None)
+        job.future = Future()
+        self.assertEqual(job.toDict()['status'], jobs.PENDING)
+        job.future.set_running_or_notify_cancel()
+        self.assertEqual(job.toDict()['status'], jobs.RUNNING)
+
+    def test_include_api_patterns(self):
+        module = types.ModuleType('reports')
+        module.report = self.api
+        for router in (False, True):
+            patterns = include_api_patterns(module, router=router)[0]
+            self.assertEqual(patterns[0].name, jobs.URL_NAME)
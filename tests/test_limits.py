@@ -0,0 +1,44 @@
+import json
+
+from django.test import RequestFactory, SimpleTestCase
+
+from dresta.exceptions import OverloadedError, RateLimitError
+from dresta.limits import ConcurrencyLimit
+from dresta.views import Api
+
+
+def ping(request):
+    return {}
+
+
+class LimitTest(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_rate_limited(self):
+        view = Api(func=ping, rate=(1, 1))
+        self.assertEqual(view(self.factory.get('/')).status_code, 200)
+
+        response = view(self.factory.get('/'))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(
+            json.loads(response.content),
+            {'retry': 1, 'code': RateLimitError.RATE_LIMITED,
+             'detail': 'Too Many Requests'}
+        )
+
+    def test_overloaded(self):
+        limit = ConcurrencyLimit(1)
+        view = Api(func=ping, concurrency=limit)
+        limit.acquire()
+        try:
+            response = view(self.factory.get('/'))
+        finally:
+            limit.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(
+            json.loads(response.content)['code'], OverloadedError.OVERLOADED
+        )
@@ -0,0 +1,42 @@
+import json
+
+from typing import List
+
+from django.http import QueryDict
+from django.test import RequestFactory, SimpleTestCase
+
+from dresta.exceptions import VALI_ERROR
+from dresta.parser import parseQueryDict
+from dresta.views import Api
+
+
+def items(request, items: List[int]):
+    return {'items': items}
+
+
+class ParserTest(SimpleTestCase):
+
+    def parse(self, query):
+        return parseQueryDict(QueryDict(query))
+
+    def test_indices(self):
+        self.assertEqual(
+            self.parse('l[1]=b&l[0]=a'), {'l': [['a'], ['b']]}
+        )
+        self.assertEqual(
+            self.parse('l[0][id]=1&l[1][id]=2'),
+            {'l': [{'id': ['1']}, {'id': ['2']}]}
+        )
+
+    def test_sparse_indices(self):
+        self.assertEqual(self.parse('l[5]=x'), {'l': {'5': ['x']}})
+        self.assertEqual(
+            self.parse('l[0]=a&l[2]=c'), {'l': {'0': ['a'], '2': ['c']}}
+        )
+
+    def test_sparse_list(self):
+        api = Api(func=items)
+        response = api(RequestFactory().get('/?items[5]=1'))
+        error = json.loads(response.content)
+        self.assertTrue(error['code'] & VALI_ERROR)
+        self.assertIn('items', error['validation'])
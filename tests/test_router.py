@@ -0,0 +1,57 @@
+import types
+
+from django.test import SimpleTestCase
+from django.urls import NoReverseMatch, include, path
+
+from dresta import include_api_patterns
+from dresta.router import AppRouter, Router, reverse
+from dresta.views import Api
+
+
+def add(request, a: int, b: int):
+    return {'sum': a + b}
+
+
+class RouterTest(SimpleTestCase):
+
+    def setUp(self):
+        self.api = Api(func=add)
+        self.module = types.ModuleType('calc.api')
+        self.module.add = self.api
+
+    def urlconf(self, *patterns):
+        urlconf = types.ModuleType('urls')
+        urlconf.urlpatterns = list(patterns)
+        return urlconf
+
+    def test_urlpattern(self):
+        self.assertIsNone(Router({'add': self.api}).urlpattern.name)
+        self.assertEqual(
+            Router({'add': self.api}, 'calc.api').urlpattern.name,
+            'dresta_api.calc.api'
+        )
+        self.assertEqual(
+            AppRouter({'calc': {'add': self.api}}).urlpattern.name,
+            'dresta_api'
+        )
+
+    def test_reverse_app_router(self):
+        urlconf = self.urlconf(path('api/', include(
+            [AppRouter({'calc': {'add': self.api}}).urlpattern]
+        )))
+        self.assertEqual(
+            reverse('calc', 'add', urlconf, {'a': 1}), '/api/calc/add/?a=1'
+        )
+
+    def test_reverse_router(self):
+        urlconf = self.urlconf(path(
+            'calc/', include_api_patterns(self.module, router=True)
+        ))
+        self.assertEqual(reverse('calc.api', 'add', urlconf), '/calc/add/')
+
+    def test_reverse_missing(self):
+        urlconf = self.urlconf(path(
+            'calc/', include_api_patterns(self.module, router=False)
+        ))
+        with self.assertRaisesMessage(NoReverseMatch, "'calc.api'"):
+            reverse('calc.api', 'add', urlconf)